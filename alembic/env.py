@@ -6,6 +6,9 @@ from app.db.session import Base
 from app.models.user import User
 from app.models.access_key import AccessKey
 from app.models.chatbot import Chatbot
+from app.models.ingestion_job import IngestionJob
+from app.models.document_fingerprint import DocumentFingerprint
+from app.models.crawl_state import CrawlState
 from app.core.config import settings
 
 config = context.config
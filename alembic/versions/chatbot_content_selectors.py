@@ -0,0 +1,23 @@
+"""add chatbot content selectors
+
+Revision ID: chatbot_content_selectors
+Revises: crawl_states
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'chatbot_content_selectors'
+down_revision = 'crawl_states'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.add_column('chatbots', sa.Column('content_include_selectors', sa.String(), nullable=True))
+    op.add_column('chatbots', sa.Column('content_exclude_selectors', sa.String(), nullable=True))
+
+def downgrade() -> None:
+    op.drop_column('chatbots', 'content_exclude_selectors')
+    op.drop_column('chatbots', 'content_include_selectors')
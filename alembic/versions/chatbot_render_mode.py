@@ -0,0 +1,21 @@
+"""add chatbot render mode
+
+Revision ID: chatbot_render_mode
+Revises: document_fingerprints
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'chatbot_render_mode'
+down_revision = 'document_fingerprints'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.add_column('chatbots', sa.Column('render_mode', sa.String(), nullable=True))
+
+def downgrade() -> None:
+    op.drop_column('chatbots', 'render_mode')
@@ -0,0 +1,25 @@
+"""add chatbot retrieval settings
+
+Revision ID: chatbot_retrieval
+Revises: initial
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'chatbot_retrieval'
+down_revision = 'initial'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.add_column('chatbots', sa.Column('search_mode', sa.String(), nullable=True))
+    op.add_column('chatbots', sa.Column('lexical_weight', sa.Float(), nullable=True))
+    op.add_column('chatbots', sa.Column('vector_weight', sa.Float(), nullable=True))
+
+def downgrade() -> None:
+    op.drop_column('chatbots', 'vector_weight')
+    op.drop_column('chatbots', 'lexical_weight')
+    op.drop_column('chatbots', 'search_mode')
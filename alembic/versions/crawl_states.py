@@ -0,0 +1,39 @@
+"""add crawl states
+
+Revision ID: crawl_states
+Revises: chatbot_render_mode
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'crawl_states'
+down_revision = 'chatbot_render_mode'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.create_table(
+        'crawl_states',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('chatbot_id', sa.Integer(), nullable=False),
+        sa.Column('url', sa.String(), nullable=False),
+        sa.Column('etag', sa.String(), nullable=True),
+        sa.Column('last_modified', sa.String(), nullable=True),
+        sa.Column('lastmod', sa.String(), nullable=True),
+        sa.Column('content_hash', sa.String(), nullable=True),
+        sa.Column('document_id', sa.String(), nullable=True),
+        sa.Column('crawled_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['chatbot_id'], ['chatbots.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('chatbot_id', 'url', name='uq_crawl_states_chatbot_url')
+    )
+    op.create_index(op.f('ix_crawl_states_id'), 'crawl_states', ['id'], unique=False)
+    op.create_index(op.f('ix_crawl_states_chatbot_id'), 'crawl_states', ['chatbot_id'], unique=False)
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_crawl_states_chatbot_id'), table_name='crawl_states')
+    op.drop_index(op.f('ix_crawl_states_id'), table_name='crawl_states')
+    op.drop_table('crawl_states')
@@ -0,0 +1,43 @@
+"""add document fingerprints
+
+Revision ID: document_fingerprints
+Revises: ingestion_jobs
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'document_fingerprints'
+down_revision = 'ingestion_jobs'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.create_table(
+        'document_fingerprints',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('chatbot_id', sa.Integer(), nullable=False),
+        sa.Column('fingerprint', sa.BigInteger(), nullable=False),
+        sa.Column('band0', sa.Integer(), nullable=False),
+        sa.Column('band1', sa.Integer(), nullable=False),
+        sa.Column('band2', sa.Integer(), nullable=False),
+        sa.Column('band3', sa.Integer(), nullable=False),
+        sa.Column('parent_id', sa.String(), nullable=True),
+        sa.Column('chunk_id', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['chatbot_id'], ['chatbots.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_document_fingerprints_id'), 'document_fingerprints', ['id'], unique=False)
+    op.create_index(op.f('ix_document_fingerprints_chatbot_id'), 'document_fingerprints', ['chatbot_id'], unique=False)
+    for band in range(4):
+        op.create_index(f'ix_document_fingerprints_band{band}', 'document_fingerprints', ['chatbot_id', f'band{band}'], unique=False)
+
+def downgrade() -> None:
+    for band in range(4):
+        op.drop_index(f'ix_document_fingerprints_band{band}', table_name='document_fingerprints')
+    op.drop_index(op.f('ix_document_fingerprints_chatbot_id'), table_name='document_fingerprints')
+    op.drop_index(op.f('ix_document_fingerprints_id'), table_name='document_fingerprints')
+    op.drop_table('document_fingerprints')
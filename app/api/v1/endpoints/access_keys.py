@@ -3,11 +3,11 @@ from sqlalchemy.orm import Session
 from app.db.session import get_db
 from app.schemas.access_key import AccessKey, AccessKeyCreate
 from app.services.access_key import create_access_key, deactivate_access_key, validate_access_key
-from app.services.chatbot import get_chatbot
+from app.services.chatbot import get_chatbot, get_retrieval_options
 from app.api.v1.endpoints.chatbots import ChatMessage, ChatResponse
 from app.services.session import get_or_create_session
 from app.services.chat_history import get_chat_history, create_chat_history
-from app.services.elasticsearch import search_documents
+from app.services.elasticsearch import search_documents_async
 from app.core.config import settings
 import requests
 import json
@@ -76,10 +76,11 @@ async def chat_with_bot_using_key(
         chat_history = "\n".join([f"{chat.role}: {chat.message}" for chat in recent_chats])
 
         # Get relevant documents from Elasticsearch
-        relevant_docs = search_documents(
+        relevant_docs = await search_documents_async(
             index_id=chatbot.index_id,
             query=message.message,
-            size=3
+            size=3,
+            **get_retrieval_options(chatbot)
         )
 
         # Prepare context from relevant documents
@@ -1,10 +1,11 @@
 from typing import List, Dict, Any, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
 from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from app.db.session import get_db
 from app.schemas.chatbot import Chatbot, ChatbotCreate, ChatbotUpdate
-from app.schemas.document import Document, DocumentCreate
+from app.schemas.ingestion_job import IngestionJob
 from app.schemas.chat_history import ChatHistoryCreate, ChatHistoryResponse
 from app.schemas.session import SessionList
 from app.services.chatbot import (
@@ -12,16 +13,20 @@ from app.services.chatbot import (
     get_chatbots_by_user,
     create_chatbot,
     update_chatbot,
-    delete_chatbot
+    delete_chatbot,
+    get_retrieval_options
 )
-from app.services.document_processor import extract_text_from_file
-from app.services.document import create_document
-from app.services.elasticsearch import search_documents
+from app.services.archive import get_archive_type
+from app.services.document_processor import SUPPORTED_FILE_TYPES, extract_sections_from_file
+from app.services.ingestion_job import create_job
+from app.services.ingestion_worker import ingestion_worker
+from app.services.elasticsearch import search_documents_async
 from app.services.chat_history import create_chat_history, get_chat_history
 from app.services.session import get_session, get_or_create_session, get_user_sessions_with_first_message
 from app.core.config import settings
+from app.utils.upload_utils import UploadTooLargeError, read_upload_to_memory, save_upload
 import os
-import tempfile
+import uuid
 import requests
 from pydantic import BaseModel
 import json
@@ -39,10 +44,10 @@ class ChatResponse(BaseModel):
     session_id: str
 
 @router.post("/", response_model=Chatbot, status_code=status.HTTP_201_CREATED)
-def create_new_chatbot(chatbot: ChatbotCreate, db: Session = Depends(get_db)):
+async def create_new_chatbot(chatbot: ChatbotCreate, db: Session = Depends(get_db)):
     """Create a new chatbot."""
     try:
-        return create_chatbot(db=db, chatbot=chatbot)
+        return await create_chatbot(db=db, chatbot=chatbot)
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -92,28 +97,29 @@ def update_existing_chatbot(
     return db_chatbot
 
 @router.delete("/{chatbot_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_existing_chatbot(chatbot_id: int, db: Session = Depends(get_db)):
+async def delete_existing_chatbot(chatbot_id: int, db: Session = Depends(get_db)):
     """Delete a chatbot."""
-    if not delete_chatbot(db=db, chatbot_id=chatbot_id):
+    if not await delete_chatbot(db=db, chatbot_id=chatbot_id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Chatbot not found"
         )
     return None
 
-@router.post("/{chatbot_id}/upload-document", response_model=Document)
+@router.post("/{chatbot_id}/upload-document", response_model=IngestionJob, status_code=status.HTTP_202_ACCEPTED)
 async def upload_document(
     chatbot_id: int,
     file: UploadFile = File(...),
     db: Session = Depends(get_db)
 ):
     """
-    Upload and process a document for a specific chatbot.
+    Upload a document for a specific chatbot and queue it for processing.
     Supported file types: docx, pptx, pdf, txt
+    Poll GET /jobs/{job_id} for progress.
     """
     try:
         # Verify chatbot exists
-        chatbot = get_chatbot(db, chatbot_id=chatbot_id)
+        chatbot = await run_in_threadpool(get_chatbot, db, chatbot_id=chatbot_id)
         if not chatbot:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -122,48 +128,115 @@ async def upload_document(
 
         # Get file extension
         file_extension = os.path.splitext(file.filename)[1].lower().lstrip('.')
-        if file_extension not in ['docx', 'pptx', 'pdf', 'txt']:
+        if file_extension not in SUPPORTED_FILE_TYPES:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Unsupported file type. Supported types: docx, pptx, pdf, txt"
             )
 
-        # Save uploaded file temporarily
-        with tempfile.NamedTemporaryFile(delete=False, suffix=f".{file_extension}") as temp_file:
-            content = await file.read()
-            temp_file.write(content)
-            temp_file_path = temp_file.name
+        if file.size is not None and file.size > settings.MAX_UPLOAD_SIZE_BYTES:
+            raise UploadTooLargeError(settings.MAX_UPLOAD_SIZE_BYTES)
+
+        payload = {"filename": file.filename, "file_type": file_extension}
+        if file.size is not None and file.size <= settings.UPLOAD_IN_MEMORY_MAX_BYTES:
+            # Small files are parsed from memory right away; the job only chunks and indexes the text
+            buffer = await read_upload_to_memory(file, settings.UPLOAD_IN_MEMORY_MAX_BYTES, settings.UPLOAD_CHUNK_SIZE_BYTES)
+            sections = await run_in_threadpool(extract_sections_from_file, buffer, file_extension)
+            if not sections:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Could not extract text from the file"
+                )
+            payload["sections"] = sections
+        else:
+            # Keep the upload on disk until the job has processed it
+            file_path = os.path.join(settings.INGESTION_UPLOAD_DIR, f"{uuid.uuid4().hex}.{file_extension}")
+            await save_upload(file, file_path, settings.MAX_UPLOAD_SIZE_BYTES, settings.UPLOAD_CHUNK_SIZE_BYTES)
+            payload["file_path"] = file_path
+
+        job = await run_in_threadpool(
+            create_job,
+            db,
+            chatbot_id=chatbot_id,
+            kind="document",
+            payload=payload
+        )
+        ingestion_worker.enqueue()
+
+        return job
+
+    except HTTPException:
+        raise
+    except UploadTooLargeError as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error processing document: {str(e)}"
+        )
+
+@router.post("/{chatbot_id}/upload-archive", response_model=IngestionJob, status_code=status.HTTP_202_ACCEPTED)
+async def upload_archive(
+    chatbot_id: int,
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db)
+):
+    """
+    Upload a ZIP or TAR archive of docx, pptx, pdf and txt files for a
+    specific chatbot and queue it for processing. The finished job's result
+    has a summary per file. Poll GET /jobs/{job_id} for progress.
+    """
+    try:
+        # Verify chatbot exists
+        chatbot = await run_in_threadpool(get_chatbot, db, chatbot_id=chatbot_id)
+        if not chatbot:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Chatbot not found"
+            )
 
-        # Extract text from file
-        content = extract_text_from_file(temp_file_path, file_extension)
-        if not content:
+        archive_type = get_archive_type(file.filename or "")
+        if archive_type is None:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Could not extract text from the file"
+                detail="Unsupported archive type. Supported types: zip, tar, tar.gz, tgz, tar.bz2, tar.xz"
             )
 
-        # Create document in Elasticsearch
-        document = create_document(
-            db=db,
-            document=DocumentCreate(
-                chatbot_id=chatbot_id,
-                content=content,
-                metadata={
-                    "filename": file.filename,
-                    "file_type": file_extension,
-                    "original_size": len(content)
-                }
-            )
+        if file.size is not None and file.size > settings.MAX_ARCHIVE_SIZE_BYTES:
+            raise UploadTooLargeError(settings.MAX_ARCHIVE_SIZE_BYTES)
+
+        file_path = os.path.join(settings.INGESTION_UPLOAD_DIR, f"{uuid.uuid4().hex}.{archive_type}")
+        await save_upload(file, file_path, settings.MAX_ARCHIVE_SIZE_BYTES, settings.UPLOAD_CHUNK_SIZE_BYTES)
+
+        job = await run_in_threadpool(
+            create_job,
+            db,
+            chatbot_id=chatbot_id,
+            kind="archive",
+            payload={
+                "file_path": file_path,
+                "filename": file.filename,
+                "archive_type": archive_type
+            }
         )
+        ingestion_worker.enqueue()
 
-        return document
+        return job
 
     except HTTPException:
         raise
+    except UploadTooLargeError as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error processing document: {str(e)}"
+            detail=f"Error processing archive: {str(e)}"
         )
 
 @router.post("/{chatbot_id}/chat")
@@ -192,10 +265,11 @@ async def chat_with_bot(
         chat_history = "\n".join([f"{chat.role}: {chat.message}" for chat in recent_chats])
 
         # Get relevant documents from Elasticsearch
-        relevant_docs = search_documents(
+        relevant_docs = await search_documents_async(
             index_id=chatbot.index_id,
             query=message.message,
-            size=3  # Get top 3 most relevant documents
+            size=3,  # Get top 3 most relevant documents
+            **get_retrieval_options(chatbot)
         )
 
         # Prepare context from relevant documents
@@ -0,0 +1,18 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+from app.db.session import get_db
+from app.schemas.ingestion_job import IngestionJob
+from app.services.ingestion_job import get_job
+
+router = APIRouter()
+
+@router.get("/{job_id}", response_model=IngestionJob)
+def read_job(job_id: str, db: Session = Depends(get_db)):
+    """Get the status, progress and per-item errors of an ingestion job."""
+    job = get_job(db, job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    return job
@@ -23,7 +23,86 @@ class Settings(BaseSettings):
     ELASTICSEARCH_URL: str = "http://localhost:9200"
     ELASTICSEARCH_USER: str = "elastic"  # Default Elasticsearch username
     ELASTICSEARCH_PASSWORD: str = ""  # Default is empty for local development
+    ELASTICSEARCH_MAX_CONNECTIONS: int = 10  # Pooled connections per node for the async client
+    ELASTICSEARCH_REQUEST_TIMEOUT: int = 30
+    BULK_CHUNK_SIZE: int = 200  # Documents embedded and sent per _bulk request
+    BULK_MAX_RETRIES: int = 3  # Retries with backoff for items rejected with 429
+    VECTOR_STORE: str = "elasticsearch"  # "elasticsearch" or "local" (memory-mapped NumPy files per bot)
+    LOCAL_VECTOR_STORE_PATH: str = "data/vector_store"
+    SEARCH_MODE: str = "knn"  # "knn" (approximate, HNSW), "exact" (script_score over every document) or "hybrid"
+    KNN_NUM_CANDIDATES: int = 100  # Candidates considered per shard in kNN search
+    HYBRID_RANK_WINDOW: int = 50  # Hits taken from each of the BM25 and kNN rankings before fusion
+    HYBRID_LEXICAL_WEIGHT: float = 1.0  # Default weight of the BM25 ranking, overridable per chatbot
+    HYBRID_VECTOR_WEIGHT: float = 1.0  # Default weight of the kNN ranking, overridable per chatbot
+    RRF_RANK_CONSTANT: int = 60
+    RETRIEVAL_CACHE_SIZE: int = 1000  # Cached search results, 0 disables the cache
+    RETRIEVAL_CACHE_TTL_SECONDS: float = 300.0
+    RETRIEVAL_CACHE_SETTLE_SECONDS: float = 1.5  # No caching this long after a write; covers the index refresh interval (1s by default)
     SELENIUM_REMOTE_URL:str= "http://localhost:4444/wd/hub"
+    SELENIUM_POOL_SIZE: int = 4  # WebDriver sessions per API process, i.e. pages loaded concurrently
+    SELENIUM_MAX_PAGES_PER_DRIVER: int = 50  # Sessions are replaced after this many pages to bound browser memory
+    SELENIUM_ACQUIRE_TIMEOUT_SECONDS: float = 60.0  # How long to wait for a free session before failing the page
+    SELENIUM_PAGE_LOAD_TIMEOUT_SECONDS: float = 30.0
+
+    # Scraping
+    HTTP_MAX_CONNECTIONS: int = 50  # Pooled connections of the shared HTTP client used for pages and sitemaps
+    HTTP_TIMEOUT_SECONDS: float = 20.0
+    HTTP_MAX_RESPONSE_BYTES: int = 10 * 1024 * 1024  # Larger pages and sitemaps are rejected
+    HTTP_USER_AGENT: str = "Mozilla/5.0 (compatible; AI-Bot/1.0)"
+    SCRAPE_RENDER_MODE: str = "auto"  # "auto", "http" or "browser", overridable per chatbot
+    SCRAPE_MIN_TEXT_CHARS: int = 200  # In "auto" mode, pages with scripts and less text are rendered in a browser
+    SCRAPE_CONCURRENCY: int = 16  # Sitemap pages fetched at once; rendered pages also wait for the WebDriver pool
+    CRAWL_HOST_CONCURRENCY: int = 4  # Requests in flight per host during sitemap crawls
+    CRAWL_HOST_RATE: float = 2.0  # Requests per second per host, lowered by robots.txt Crawl-delay
+    CRAWL_HOST_BURST: int = 4  # Requests a host may get back to back before the rate applies
+    CRAWL_MAX_RETRIES: int = 3  # Retries for connection errors, 429 and 5xx responses
+    CRAWL_RETRY_BASE_DELAY_SECONDS: float = 1.0  # Doubled on each retry, with jitter
+    CRAWL_MAX_RETRY_DELAY_SECONDS: float = 60.0  # Also caps Retry-After
+    CRAWL_ROBOTS_TTL_SECONDS: int = 3600  # How long a host's robots.txt is reused
+    CRAWL_ROBOTS_MAX_BYTES: int = 512 * 1024
+    CRAWL_ROBOTS_USER_AGENT: str = "AI-Bot"  # Product token matched against robots.txt User-agent lines
+    CONTENT_EXTRACTION_ENABLED: bool = True  # Index only the main content of pages, without navigation and boilerplate
+    CONTENT_MIN_CHARS: int = 200  # Smaller main-content candidates fall back to the whole cleaned page
+    SITEMAP_MAX_DEPTH: int = 2  # Levels of nested sitemap indexes followed
+    SITEMAP_MAX_BYTES: int = 50 * 1024 * 1024  # Uncompressed size limit per sitemap file (the protocol's own limit)
+
+    # Embeddings
+    EMBEDDING_MODEL_NAME: str = "all-MiniLM-L6-v2"
+    EMBEDDING_BACKEND: str = "torch"  # "torch" or "onnx" (int8-quantized ONNX Runtime)
+    EMBEDDING_ONNX_MODEL_DIR: Optional[str] = None  # Output of scripts/export_onnx_model.py
+    EMBEDDING_ONNX_THREADS: int = 0  # Intra-op threads for ONNX Runtime, 0 uses its default
+    EMBEDDING_BATCH_SIZE: int = 32  # Max texts encoded in one forward pass
+    EMBEDDING_BATCH_WAIT_MS: float = 5.0  # How long to wait for more requests before encoding
+    EMBEDDING_WORKERS: int = 0  # Worker processes running the model, 0 encodes in the API process
+    EMBEDDING_CACHE_SIZE: int = 10000  # Vectors kept in the in-memory LRU tier
+    EMBEDDING_CACHE_PATH: Optional[str] = None  # SQLite file for the on-disk tier, disabled when unset
+    CHUNK_SIZE_TOKENS: int = 200  # Keep below the model's max sequence length (256 for MiniLM)
+    CHUNK_OVERLAP_TOKENS: int = 32
+    DOCUMENT_PREVIEW_CHARS: int = 2000  # Text kept as the content of documents indexed while they are extracted
+    DEDUP_ENABLED: bool = True  # Skip chunks that nearly duplicate content already stored for the bot
+    DEDUP_MAX_DISTANCE: int = 3  # Max differing SimHash bits (of 64) for a near-duplicate, at most 3
+    DEDUP_MIN_WORDS: int = 8  # Shorter chunks are always indexed
+    EXTRACTION_WORKERS: int = 0  # Processes extracting PDF page ranges in parallel, 0 extracts in the calling thread
+    EXTRACTION_PARALLEL_MIN_PAGES: int = 40  # Smaller PDFs are extracted sequentially
+    EXTRACTION_PAGES_PER_TASK: int = 10  # Pages per range handed to an extraction process
+    EXTRACTION_CACHE_PATH: Optional[str] = "data/extraction_cache"  # Extracted text by file SHA-256, disabled when unset
+    EXTRACTION_CACHE_MAX_BYTES: int = 1024 * 1024 * 1024  # Compressed size before least recently used entries are evicted
+    WARM_UP_ON_STARTUP: bool = True  # Load the model and connect to Elasticsearch in the startup event
+
+    # Background ingestion
+    INGESTION_CONCURRENCY: int = 2  # Jobs run at once per API process, 0 disables the worker
+    INGESTION_UPLOAD_DIR: str = "data/uploads"  # Uploaded files waiting for their job
+    MAX_UPLOAD_SIZE_BYTES: int = 100 * 1024 * 1024  # Larger uploads are rejected with 413
+    UPLOAD_CHUNK_SIZE_BYTES: int = 1024 * 1024  # Read size when copying uploads
+    UPLOAD_IN_MEMORY_MAX_BYTES: int = 2 * 1024 * 1024  # Smaller uploads are parsed from memory during the request
+    MAX_ARCHIVE_SIZE_BYTES: int = 1024 * 1024 * 1024  # Limit for ZIP/TAR uploads; each file inside is limited to MAX_UPLOAD_SIZE_BYTES
+    ARCHIVE_MAX_FILES: int = 1000
+    ARCHIVE_PARALLEL_FILES: int = 4  # Archive entries extracted concurrently
+    INGESTION_POLL_INTERVAL_SECONDS: float = 5.0  # How often idle workers look for jobs queued by other processes
+    INGESTION_STALE_JOB_SECONDS: int = 900  # Running jobs without a heartbeat for this long are picked up again
+    INGESTION_MAX_ATTEMPTS: int = 3  # Jobs interrupted more often than this are marked failed
+    INGESTION_MAX_ERRORS: int = 100  # Per-item errors kept on a job
+
     # JWT
     SECRET_KEY: str = "your-secret-key-here"
     ALGORITHM: str = "HS256"
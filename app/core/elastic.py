@@ -7,10 +7,15 @@ class ElasticsearchClient:
 
     async def init(self):
         """Initialize the Elasticsearch client with settings from config."""
+        if self.client:
+            return
+        # One client per process, shared by every request; its connection pool is bounded per node
         self.client = AsyncElasticsearch(
-            hosts=[f"http://{settings.ELASTICSEARCH_HOST}:{settings.ELASTICSEARCH_PORT}"],
+            settings.ELASTICSEARCH_URL,
+            basic_auth=(settings.ELASTICSEARCH_USER, settings.ELASTICSEARCH_PASSWORD),
             verify_certs=False,  # Set to True in production with proper certificates
-            timeout=30,
+            request_timeout=settings.ELASTICSEARCH_REQUEST_TIMEOUT,
+            connections_per_node=settings.ELASTICSEARCH_MAX_CONNECTIONS,
             max_retries=3,
             retry_on_timeout=True
         )
@@ -19,6 +24,7 @@ class ElasticsearchClient:
         """Close the Elasticsearch client connection."""
         if self.client:
             await self.client.close()
+            self.client = None
 
     async def get_client(self):
         """Get the Elasticsearch client instance."""
@@ -0,0 +1,36 @@
+import httpx
+from app.core.config import settings
+
+class HttpClient:
+    def __init__(self):
+        self.client = None
+
+    async def init(self):
+        """Initialize the shared HTTP client used for fetching pages and sitemaps."""
+        if self.client:
+            return
+        # One client per process so connections (and TLS sessions) are reused across pages of a site
+        self.client = httpx.AsyncClient(
+            timeout=settings.HTTP_TIMEOUT_SECONDS,
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_MAX_CONNECTIONS
+            ),
+            follow_redirects=True,
+            headers={"User-Agent": settings.HTTP_USER_AGENT}
+        )
+
+    async def close(self):
+        """Close the HTTP client and its pooled connections."""
+        if self.client:
+            await self.client.aclose()
+            self.client = None
+
+    async def get_client(self) -> httpx.AsyncClient:
+        """Get the HTTP client instance."""
+        if not self.client:
+            await self.init()
+        return self.client
+
+# Create a singleton instance
+http_client = HttpClient()
@@ -1,44 +1,136 @@
+from typing import Optional, List
+from contextlib import asynccontextmanager
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.remote.webdriver import WebDriver
+from selenium.common.exceptions import WebDriverException
 from app.core.config import settings
+import asyncio
+
+class DriverPoolTimeout(TimeoutError):
+    """No WebDriver session became free within the acquire timeout."""
+
+class PooledDriver:
+    def __init__(self, driver: WebDriver):
+        self.driver = driver
+        self.pages = 0
 
 class SeleniumClient:
+    """
+    Bounded pool of Remote WebDriver sessions, shared by every request and job
+    of the process. Sessions are checked before being handed out, replaced
+    after SELENIUM_MAX_PAGES_PER_DRIVER pages or after a WebDriver error, and
+    kept open between requests. Driver calls block, so callers run them with
+    asyncio.to_thread.
+    """
+
     def __init__(self):
-        self.driver = None
+        self._idle: List[PooledDriver] = []
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._closed = False
+
+    def _create_driver(self) -> WebDriver:
+        chrome_options = Options()
+        chrome_options.add_argument('--no-sandbox')
+        chrome_options.add_argument('--headless')
+        chrome_options.add_argument('--disable-dev-shm-usage')
+        chrome_options.add_argument('--disable-gpu')
+
+        driver = webdriver.Remote(
+            command_executor=settings.SELENIUM_REMOTE_URL,
+            options=chrome_options
+        )
+        driver.set_page_load_timeout(settings.SELENIUM_PAGE_LOAD_TIMEOUT_SECONDS)
+        return driver
+
+    @staticmethod
+    def _is_healthy(pooled: PooledDriver) -> bool:
+        try:
+            pooled.driver.current_url
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _quit(pooled: PooledDriver):
+        try:
+            pooled.driver.quit()
+        except Exception as e:
+            print(f"Error closing Selenium WebDriver: {str(e)}")
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(settings.SELENIUM_POOL_SIZE)
+        return self._semaphore
 
-    def init(self):
-        """Initialize the Selenium WebDriver with remote settings from config."""
+    async def init(self):
+        """Open the first WebDriver session so the grid is checked at startup."""
+        self._closed = False
         try:
-            chrome_options = Options()
-            chrome_options.add_argument('--no-sandbox')
-            chrome_options.add_argument('--headless')
-            chrome_options.add_argument('--disable-dev-shm-usage')
-            chrome_options.add_argument('--disable-gpu')
-            
-            self.driver = webdriver.Remote(
-                command_executor=settings.SELENIUM_REMOTE_URL,
-                options=chrome_options
-            )
+            async with self.driver():
+                pass
             return True
         except Exception as e:
             print(f"Error initializing Selenium WebDriver: {str(e)}")
             return False
 
-    def close(self):
-        """Close the Selenium WebDriver."""
-        if self.driver:
-            try:
-                self.driver.quit()
-            except Exception as e:
-                print(f"Error closing Selenium WebDriver: {str(e)}")
+    async def acquire(self, timeout: Optional[float] = None) -> PooledDriver:
+        """
+        Take a session from the pool, opening one if none is idle. Raises
+        DriverPoolTimeout when all SELENIUM_POOL_SIZE sessions stay busy for
+        longer than timeout (SELENIUM_ACQUIRE_TIMEOUT_SECONDS by default).
+        """
+        timeout = settings.SELENIUM_ACQUIRE_TIMEOUT_SECONDS if timeout is None else timeout
+        semaphore = self._get_semaphore()
+        try:
+            await asyncio.wait_for(semaphore.acquire(), timeout)
+        except asyncio.TimeoutError:
+            raise DriverPoolTimeout(f"No WebDriver session became free within {timeout} seconds")
+
+        try:
+            while self._idle:
+                pooled = self._idle.pop()
+                if await asyncio.to_thread(self._is_healthy, pooled):
+                    return pooled
+                await asyncio.to_thread(self._quit, pooled)
+            return PooledDriver(await asyncio.to_thread(self._create_driver))
+        except BaseException:
+            semaphore.release()
+            raise
+
+    async def release(self, pooled: PooledDriver, discard: bool = False):
+        """Return a session to the pool, quitting it when discarded, worn out or closing."""
+        try:
+            pooled.pages += 1
+            if discard or self._closed or pooled.pages >= settings.SELENIUM_MAX_PAGES_PER_DRIVER:
+                await asyncio.to_thread(self._quit, pooled)
+            else:
+                self._idle.append(pooled)
+        finally:
+            self._get_semaphore().release()
+
+    @asynccontextmanager
+    async def driver(self, timeout: Optional[float] = None):
+        """Lease a WebDriver for loading one page; the session is replaced after a WebDriver error."""
+        pooled = await self.acquire(timeout)
+        try:
+            yield pooled.driver
+        except (WebDriverException, asyncio.CancelledError):
+            # A cancelled caller may leave its driver call running in a thread, so that session is not reused either
+            await self.release(pooled, discard=True)
+            raise
+        except BaseException:
+            # Other errors, e.g. a page that failed to navigate, leave the session usable
+            await self.release(pooled)
+            raise
+        await self.release(pooled)
 
-    def get_driver(self) -> WebDriver:
-        """Get the Selenium WebDriver instance."""
-        if not self.driver:
-            self.init()
-        return self.driver
+    async def close(self):
+        """Quit idle sessions; sessions in use are quit when released."""
+        self._closed = True
+        idle, self._idle = self._idle, []
+        for pooled in idle:
+            await asyncio.to_thread(self._quit, pooled)
 
 # Create a singleton instance
-selenium_client = SeleniumClient() 
\ No newline at end of file
+selenium_client = SeleniumClient()
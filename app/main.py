@@ -1,9 +1,16 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from app.api.v1.endpoints import auth, chatbots, access_keys, scrape, users
+from fastapi.responses import JSONResponse
+from app.api.v1.endpoints import auth, chatbots, access_keys, scrape, users, jobs
 from app.core.config import settings
 from app.core.elastic import elasticsearch_client
+from app.core.http import http_client
 from app.core.selenium import selenium_client
+from app.services.embedding import embedding_batcher, warm_up_embeddings
+from app.services.elasticsearch import check_connection_async
+from app.services.ingestion_worker import ingestion_worker
+from app.services.document_processor import shutdown_extraction_pool
+import asyncio
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version=settings.VERSION,
@@ -19,24 +26,62 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Room for multipart boundaries and part headers on top of the file itself
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+@app.middleware("http")
+async def limit_upload_size(request: Request, call_next):
+    """Reject oversized uploads from their Content-Length before the body is read."""
+    content_length = request.headers.get("content-length")
+    max_bytes = settings.MAX_ARCHIVE_SIZE_BYTES if request.url.path.endswith("/upload-archive") else settings.MAX_UPLOAD_SIZE_BYTES
+    if (
+        request.headers.get("content-type", "").startswith("multipart/form-data")
+        and content_length
+        and content_length.isdigit()
+        and int(content_length) > max_bytes + MULTIPART_OVERHEAD_BYTES
+    ):
+        return JSONResponse(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            content={"detail": f"File is larger than the {max_bytes} byte limit"}
+        )
+    return await call_next(request)
+
 # Include routers
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["auth"])
 app.include_router(chatbots.router, prefix="/api/v1/chatbots", tags=["chatbots"])
 app.include_router(access_keys.router, prefix="/api/v1/access-keys", tags=["access-keys"])
 app.include_router(scrape.router, prefix="/api/v1/scrape", tags=["scrape"])
 app.include_router(users.router, prefix="/api/v1/users", tags=["users"])
+app.include_router(jobs.router, prefix="/api/v1/jobs", tags=["jobs"])
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize services on startup."""
     await elasticsearch_client.init()
-    selenium_client.init()
+    await http_client.init()
+    await selenium_client.init()
+    if settings.WARM_UP_ON_STARTUP:
+        await warm_up()
+    ingestion_worker.start()
+
+async def warm_up():
+    """Load the embedding model and connect to Elasticsearch before serving traffic."""
+    try:
+        await asyncio.to_thread(warm_up_embeddings)
+    except Exception as e:
+        print(f"Error warming up embeddings: {str(e)}")
+    if settings.VECTOR_STORE == "elasticsearch":
+        await check_connection_async()
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Close services on shutdown."""
+    await ingestion_worker.stop()
     await elasticsearch_client.close()
-    selenium_client.close()
+    await http_client.close()
+    await selenium_client.close()
+    embedding_batcher.shutdown()
+    shutdown_extraction_pool()
 
 @app.get("/")
 def read_root():
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, ForeignKey
 from sqlalchemy.orm import relationship
 from app.db.session import Base
 
@@ -10,6 +10,16 @@ class Chatbot(Base):
     name = Column(String, nullable=False)
     index_id = Column(String, nullable=True)  # Can be null
 
+    # Retrieval settings, null falls back to the global defaults
+    search_mode = Column(String, nullable=True)  # 'knn', 'exact' or 'hybrid'
+    lexical_weight = Column(Float, nullable=True)
+    vector_weight = Column(Float, nullable=True)
+
+    # Scraping settings, null falls back to the global defaults
+    render_mode = Column(String, nullable=True)  # 'auto', 'http' or 'browser'
+    content_include_selectors = Column(String, nullable=True)  # CSS selector list of the main content
+    content_exclude_selectors = Column(String, nullable=True)  # CSS selector list of boilerplate to strip
+
     # Relationship with User
     user = relationship("User", back_populates="chatbots")
     
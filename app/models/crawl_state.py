@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy.sql import func
+from app.db.base_class import Base
+
+class CrawlState(Base):
+    __tablename__ = "crawl_states"
+
+    id = Column(Integer, primary_key=True, index=True)
+    chatbot_id = Column(Integer, ForeignKey("chatbots.id"), nullable=False, index=True)
+    url = Column(String, nullable=False)
+    # Validators from the last response, sent back as If-None-Match / If-Modified-Since
+    etag = Column(String, nullable=True)
+    last_modified = Column(String, nullable=True)
+    lastmod = Column(String, nullable=True)  # <lastmod> of the sitemap entry when the page was last indexed
+    content_hash = Column(String, nullable=True)  # SHA-256 of the page text that was indexed
+    document_id = Column(String, nullable=True)
+    crawled_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        UniqueConstraint("chatbot_id", "url", name="uq_crawl_states_chatbot_url"),
+    )
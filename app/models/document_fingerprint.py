@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, ForeignKey, Index
+from sqlalchemy.sql import func
+from app.db.base_class import Base
+
+class DocumentFingerprint(Base):
+    __tablename__ = "document_fingerprints"
+
+    id = Column(Integer, primary_key=True, index=True)
+    chatbot_id = Column(Integer, ForeignKey("chatbots.id"), nullable=False, index=True)
+    fingerprint = Column(BigInteger, nullable=False)  # 64-bit SimHash of the chunk, stored signed
+    # 16-bit slices of the fingerprint; near-duplicates share at least one (LSH banding)
+    band0 = Column(Integer, nullable=False)
+    band1 = Column(Integer, nullable=False)
+    band2 = Column(Integer, nullable=False)
+    band3 = Column(Integer, nullable=False)
+    parent_id = Column(String, nullable=True)  # Document the chunk belongs to
+    chunk_id = Column(String, nullable=True)  # Id of the chunk in the vector store
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_document_fingerprints_band0", "chatbot_id", "band0"),
+        Index("ix_document_fingerprints_band1", "chatbot_id", "band1"),
+        Index("ix_document_fingerprints_band2", "chatbot_id", "band2"),
+        Index("ix_document_fingerprints_band3", "chatbot_id", "band3"),
+    )
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON
+from sqlalchemy.sql import func
+from app.db.base_class import Base
+
+class IngestionJob(Base):
+    __tablename__ = "ingestion_jobs"
+
+    id = Column(String, primary_key=True, index=True)  # UUID as string
+    chatbot_id = Column(Integer, ForeignKey("chatbots.id"), nullable=False, index=True)
+    kind = Column(String, nullable=False)  # 'document' or 'sitemap'
+    status = Column(String, nullable=False, default="queued", index=True)  # 'queued', 'running', 'completed' or 'failed'
+    payload = Column(JSON, nullable=False)  # Everything the worker needs to (re)run the job
+    total_items = Column(Integer, nullable=False, default=0)
+    processed_items = Column(Integer, nullable=False, default=0)
+    failed_items = Column(Integer, nullable=False, default=0)
+    errors = Column(JSON, nullable=False, default=list)  # [{"item": ..., "error": ...}]
+    result = Column(JSON, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())  # Also the worker heartbeat
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
@@ -1,8 +1,21 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, field_validator
+from typing import Optional, Literal
+from app.utils.html_utils import parse_selectors
 
 class ChatbotBase(BaseModel):
     name: str
+    search_mode: Optional[Literal["knn", "exact", "hybrid"]] = None
+    lexical_weight: Optional[float] = None
+    vector_weight: Optional[float] = None
+    render_mode: Optional[Literal["auto", "http", "browser"]] = None
+    content_include_selectors: Optional[str] = None
+    content_exclude_selectors: Optional[str] = None
+
+    @field_validator("content_include_selectors", "content_exclude_selectors")
+    @classmethod
+    def check_selectors(cls, value: Optional[str]) -> Optional[str]:
+        parse_selectors(value)
+        return value
 
 class ChatbotCreate(ChatbotBase):
     user_id: int
@@ -5,6 +5,7 @@ from datetime import datetime
 class DocumentBase(BaseModel):
     chatbot_id: int
     metadata: Optional[Dict[str, Any]] = None
+    source: Optional[str] = None  # URL or filename; ingesting the same source again updates its chunks
 
 class DocumentCreate(DocumentBase):
     content: str
@@ -12,6 +13,10 @@ class DocumentCreate(DocumentBase):
 class Document(DocumentBase):
     id: str
     content: str
+    chunk_count: Optional[int] = None
+    skipped_chunks: Optional[int] = None  # Near-duplicates of content the bot already had
+    unchanged_chunks: Optional[int] = None  # Chunks already stored with the same content
+    deleted_chunks: Optional[int] = None  # Chunks of an earlier version that no longer exist
     created_at: datetime
 
     class Config:
@@ -0,0 +1,25 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional, List, Dict, Any
+
+class IngestionJobError(BaseModel):
+    item: Optional[str] = None
+    error: str
+
+class IngestionJob(BaseModel):
+    id: str
+    chatbot_id: int
+    kind: str
+    status: str
+    total_items: int
+    processed_items: int
+    failed_items: int
+    errors: List[IngestionJobError] = []
+    result: Optional[Dict[str, Any]] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,82 @@
+from typing import Optional, Dict, Any, Iterator
+import os
+import tarfile
+import zipfile
+from app.services.document_processor import SUPPORTED_FILE_TYPES
+
+ARCHIVE_SUFFIXES = {
+    ".zip": "zip",
+    ".tar": "tar",
+    ".tar.gz": "tar",
+    ".tgz": "tar",
+    ".tar.bz2": "tar",
+    ".tar.xz": "tar",
+}
+
+def get_archive_type(filename: str) -> Optional[str]:
+    """Return "zip" or "tar" for a supported archive name, else None."""
+    name = filename.lower()
+    for suffix, archive_type in ARCHIVE_SUFFIXES.items():
+        if name.endswith(suffix):
+            return archive_type
+    return None
+
+def _is_hidden(name: str) -> bool:
+    # Resource forks and metadata added by macOS and editors
+    return any(part.startswith(('.', '__MACOSX')) for part in name.split('/'))
+
+def _entry(name: str, size: int, max_file_bytes: int) -> Dict[str, Any]:
+    file_type = os.path.splitext(name)[1].lower().lstrip('.')
+    if file_type not in SUPPORTED_FILE_TYPES:
+        return {"name": name, "file_type": file_type, "data": None, "error": "Unsupported file type"}
+    if size > max_file_bytes:
+        return {"name": name, "file_type": file_type, "data": None, "error": f"File is larger than the {max_file_bytes} byte limit"}
+    return {"name": name, "file_type": file_type, "data": None, "error": None}
+
+def _read_limited(file, max_file_bytes: int) -> bytes:
+    # Sizes in archive headers can lie; never read more than the limit
+    data = file.read(max_file_bytes + 1)
+    if len(data) > max_file_bytes:
+        raise ValueError(f"File is larger than the {max_file_bytes} byte limit")
+    return data
+
+def _iter_tar(file_path: str, max_file_bytes: int) -> Iterator[Dict[str, Any]]:
+    # Stream mode reads members sequentially and never seeks back
+    with tarfile.open(file_path, "r|*") as archive:
+        for member in archive:
+            if not member.isfile() or _is_hidden(member.name):
+                continue
+            entry = _entry(member.name, member.size, max_file_bytes)
+            if entry["error"] is None:
+                try:
+                    entry["data"] = _read_limited(archive.extractfile(member), max_file_bytes)
+                except Exception as e:
+                    entry["error"] = str(e)
+            yield entry
+
+def _iter_zip(file_path: str, max_file_bytes: int) -> Iterator[Dict[str, Any]]:
+    with zipfile.ZipFile(file_path) as archive:
+        for info in archive.infolist():
+            if info.is_dir() or _is_hidden(info.filename):
+                continue
+            entry = _entry(info.filename, info.file_size, max_file_bytes)
+            if entry["error"] is None:
+                try:
+                    with archive.open(info) as file:
+                        entry["data"] = _read_limited(file, max_file_bytes)
+                except Exception as e:
+                    entry["error"] = str(e)
+            yield entry
+
+def iter_archive_entries(file_path: str, archive_type: str, max_file_bytes: int, max_files: int) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the files of a ZIP or TAR archive one at a time as
+    {"name", "file_type", "data", "error"}, holding at most one entry in
+    memory and writing nothing to disk. Unsupported or oversized entries are
+    yielded with an error and no data.
+    """
+    entries = _iter_zip(file_path, max_file_bytes) if archive_type == "zip" else _iter_tar(file_path, max_file_bytes)
+    for count, entry in enumerate(entries):
+        if count >= max_files:
+            raise ValueError(f"Archive has more than {max_files} files")
+        yield entry
@@ -1,12 +1,16 @@
-from typing import List, Optional
+from typing import List, Optional, Dict, Any
 from sqlalchemy.orm import Session
 from app.models.chatbot import Chatbot
 from app.models.session import Session
 from app.models.chat_history import ChatHistory
 from app.models.access_key import AccessKey
+from app.models.ingestion_job import IngestionJob
+from app.models.document_fingerprint import DocumentFingerprint
+from app.models.crawl_state import CrawlState
 from app.schemas.chatbot import ChatbotCreate, ChatbotUpdate
 from app.services.user import get_user
-from app.services.elasticsearch import create_bot_index, delete_bot_index
+from app.services.elasticsearch import create_bot_index_async, delete_bot_index_async
+import asyncio
 
 def get_chatbot(db: Session, chatbot_id: int) -> Optional[Chatbot]:
     return db.query(Chatbot).filter(Chatbot.id == chatbot_id).first()
@@ -14,7 +18,23 @@ def get_chatbot(db: Session, chatbot_id: int) -> Optional[Chatbot]:
 def get_chatbots_by_user(db: Session, user_id: int, skip: int = 0, limit: int = 100) -> List[Chatbot]:
     return db.query(Chatbot).filter(Chatbot.user_id == user_id).offset(skip).limit(limit).all()
 
-def create_chatbot(db: Session, chatbot: ChatbotCreate) -> Chatbot:
+def get_retrieval_options(chatbot: Chatbot) -> Dict[str, Any]:
+    """Search options configured on a chatbot, to pass to search_documents."""
+    return {
+        "mode": chatbot.search_mode,
+        "lexical_weight": chatbot.lexical_weight,
+        "vector_weight": chatbot.vector_weight
+    }
+
+def get_scrape_options(chatbot: Chatbot) -> Dict[str, Any]:
+    """Scraping options configured on a chatbot, to pass to process_url."""
+    return {
+        "render_mode": chatbot.render_mode,
+        "include_selectors": chatbot.content_include_selectors,
+        "exclude_selectors": chatbot.content_exclude_selectors
+    }
+
+def _insert_chatbot(db: Session, chatbot: ChatbotCreate) -> Chatbot:
     # Verify user exists
     user = get_user(db, user_id=chatbot.user_id)
     if not user:
@@ -23,23 +43,40 @@ def create_chatbot(db: Session, chatbot: ChatbotCreate) -> Chatbot:
     # Create chatbot in database first to get the ID
     db_chatbot = Chatbot(
         user_id=chatbot.user_id,
-        name=chatbot.name
+        name=chatbot.name,
+        search_mode=chatbot.search_mode,
+        lexical_weight=chatbot.lexical_weight,
+        vector_weight=chatbot.vector_weight,
+        render_mode=chatbot.render_mode,
+        content_include_selectors=chatbot.content_include_selectors,
+        content_exclude_selectors=chatbot.content_exclude_selectors
     )
     db.add(db_chatbot)
     db.commit()
     db.refresh(db_chatbot)
+    return db_chatbot
+
+def _set_index_id(db: Session, db_chatbot: Chatbot, index_id: str):
+    db_chatbot.index_id = index_id
+    db.commit()
+    db.refresh(db_chatbot)
+
+def _delete_and_commit(db: Session, db_chatbot: Chatbot):
+    db.delete(db_chatbot)
+    db.commit()
+
+async def create_chatbot(db: Session, chatbot: ChatbotCreate) -> Chatbot:
+    # The database calls block, so they run in worker threads to keep the event loop free
+    db_chatbot = await asyncio.to_thread(_insert_chatbot, db, chatbot)
     
     # Generate index_id and create Elasticsearch index
     index_id = f"bot_{db_chatbot.id}"
-    if create_bot_index(index_id):
+    if await create_bot_index_async(index_id):
         # Update chatbot with the generated index_id
-        db_chatbot.index_id = index_id
-        db.commit()
-        db.refresh(db_chatbot)
+        await asyncio.to_thread(_set_index_id, db, db_chatbot, index_id)
     else:
         # If index creation fails, delete the chatbot
-        db.delete(db_chatbot)
-        db.commit()
+        await asyncio.to_thread(_delete_and_commit, db, db_chatbot)
         raise ValueError("Failed to create Elasticsearch index")
     
     return db_chatbot
@@ -57,31 +94,42 @@ def update_chatbot(db: Session, chatbot_id: int, chatbot: ChatbotUpdate) -> Opti
     db.refresh(db_chatbot)
     return db_chatbot
 
-def delete_chatbot(db: Session, chatbot_id: int) -> bool:
-    db_chatbot = get_chatbot(db, chatbot_id)
+def _delete_related_records(db: Session, chatbot_id: int):
+    # Delete related records in the correct order
+    # 1. Delete chat history
+    db.query(ChatHistory).filter(ChatHistory.chatbot_id == chatbot_id).delete()
+    
+    # 2. Delete sessions
+    db.query(Session).filter(Session.chatbot_id == chatbot_id).delete()
+    
+    # 3. Delete access keys
+    db.query(AccessKey).filter(AccessKey.chatbot_id == chatbot_id).delete()
+    
+    # 4. Delete ingestion jobs
+    db.query(IngestionJob).filter(IngestionJob.chatbot_id == chatbot_id).delete()
+    
+    # 5. Delete near-duplicate fingerprints
+    db.query(DocumentFingerprint).filter(DocumentFingerprint.chatbot_id == chatbot_id).delete()
+    
+    # 6. Delete crawl state
+    db.query(CrawlState).filter(CrawlState.chatbot_id == chatbot_id).delete()
+
+async def delete_chatbot(db: Session, chatbot_id: int) -> bool:
+    db_chatbot = await asyncio.to_thread(get_chatbot, db, chatbot_id)
     if not db_chatbot:
         return False
     
     try:
-        # Delete related records in the correct order
-        # 1. Delete chat history
-        db.query(ChatHistory).filter(ChatHistory.chatbot_id == chatbot_id).delete()
-        
-        # 2. Delete sessions
-        db.query(Session).filter(Session.chatbot_id == chatbot_id).delete()
-        
-        # 3. Delete access keys
-        db.query(AccessKey).filter(AccessKey.chatbot_id == chatbot_id).delete()
+        await asyncio.to_thread(_delete_related_records, db, chatbot_id)
         
-        # 4. Delete Elasticsearch index if it exists
+        # 7. Delete Elasticsearch index if it exists
         if db_chatbot.index_id:
-            delete_bot_index(db_chatbot.index_id)
+            await delete_bot_index_async(db_chatbot.index_id)
         
-        # 5. Finally, delete the chatbot
-        db.delete(db_chatbot)
-        db.commit()
+        # 8. Finally, delete the chatbot
+        await asyncio.to_thread(_delete_and_commit, db, db_chatbot)
         return True
         
     except Exception as e:
-        db.rollback()
-        raise e 
\ No newline at end of file
+        await asyncio.to_thread(db.rollback)
+        raise e 
@@ -0,0 +1,100 @@
+from typing import Optional, List, Dict, Any, Iterable, Iterator, Tuple
+import re
+from app.core.config import settings
+from app.services.embedding import get_tokenizer
+
+def _split_paragraphs(text: str) -> List[str]:
+    return [paragraph.strip() for paragraph in re.split(r'\n+', text) if paragraph.strip()]
+
+def _split_long_paragraph(paragraph: str, offsets: List[Tuple[int, int]], chunk_size: int, overlap: int) -> List[Tuple[str, int]]:
+    """
+    Cut a paragraph longer than chunk_size into overlapping token windows,
+    slicing the original text at token boundaries
+    """
+    pieces = []
+    step = max(1, chunk_size - overlap)
+    for start in range(0, len(offsets), step):
+        end = min(start + chunk_size, len(offsets))
+        pieces.append((paragraph[offsets[start][0]:offsets[end - 1][1]], end - start))
+        if end == len(offsets):
+            break
+    return pieces
+
+def _chunk_section(text: str, tokenizer, chunk_size: int, overlap: int) -> List[str]:
+    paragraphs = _split_paragraphs(text)
+    if not paragraphs:
+        return []
+    encoded = tokenizer(paragraphs, add_special_tokens=False, return_offsets_mapping=True)
+
+    chunks = []
+    # Paragraphs of the chunk being built; the ones carried over as overlap are not "new"
+    current: List[Tuple[str, int]] = []
+    current_tokens = 0
+    has_new = False
+
+    def flush():
+        nonlocal current, current_tokens, has_new
+        if has_new:
+            chunks.append('\n'.join(part for part, _ in current))
+        # Carry the trailing paragraphs that fit in the overlap into the next chunk
+        tail: List[Tuple[str, int]] = []
+        tail_tokens = 0
+        for part, count in reversed(current):
+            if tail_tokens + count > overlap:
+                break
+            tail.insert(0, (part, count))
+            tail_tokens += count
+        current, current_tokens, has_new = tail, tail_tokens, False
+
+    for paragraph, offsets in zip(paragraphs, encoded["offset_mapping"]):
+        count = len(offsets)
+        if count > chunk_size:
+            flush()
+            chunks.extend(piece for piece, _ in _split_long_paragraph(paragraph, offsets, chunk_size, overlap))
+            current, current_tokens = [], 0
+            continue
+        if current_tokens + count > chunk_size:
+            flush()
+            if current_tokens + count > chunk_size:
+                current, current_tokens = [], 0
+        current.append((paragraph, count))
+        current_tokens += count
+        has_new = True
+
+    flush()
+    return chunks
+
+def iter_chunks(
+    sections: Iterable[Dict[str, Any]],
+    chunk_size: Optional[int] = None,
+    overlap: Optional[int] = None,
+    tokenizer=None
+) -> Iterator[Dict[str, Any]]:
+    """
+    Split extracted sections into chunks of at most chunk_size model tokens.
+    Chunks never cross a section (page, slide) boundary and only cut inside a
+    paragraph when the paragraph alone is too long. Each chunk keeps its
+    section's location keys, e.g. {"text": ..., "page": 3}. Sections are
+    consumed lazily, so chunks of the first pages are available while later
+    pages are still being extracted.
+    """
+    chunk_size = chunk_size or settings.CHUNK_SIZE_TOKENS
+    overlap = settings.CHUNK_OVERLAP_TOKENS if overlap is None else overlap
+    overlap = min(overlap, chunk_size // 2)
+    tokenizer = tokenizer or get_tokenizer()
+
+    for section in sections:
+        location = {key: value for key, value in section.items() if key != "text"}
+        for text in _chunk_section(section["text"], tokenizer, chunk_size, overlap):
+            yield dict(location, text=text)
+
+def chunk_sections(
+    sections: Iterable[Dict[str, Any]],
+    chunk_size: Optional[int] = None,
+    overlap: Optional[int] = None,
+    tokenizer=None
+) -> List[Dict[str, Any]]:
+    """
+    List version of iter_chunks.
+    """
+    return list(iter_chunks(sections, chunk_size, overlap, tokenizer))
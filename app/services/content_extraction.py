@@ -0,0 +1,128 @@
+from typing import Optional, Dict, Any
+from app.core.config import settings
+from app.utils.html_utils import Node, parse_tree, node_text, parse_selectors, select
+import re
+
+# Never main content
+BOILERPLATE_TAGS = {"nav", "aside", "form", "dialog", "button", "select", "menu"}
+BOILERPLATE_ROLES = {"navigation", "banner", "contentinfo", "complementary", "search", "dialog", "alertdialog"}
+# Page headers and footers, unless inside the article itself
+PAGE_FRAME_TAGS = {"header", "footer"}
+CONTENT_TAGS = {"main", "article"}
+
+UNLIKELY = re.compile(
+    r"cookie|consent|gdpr|banner|breadcrumb|sidebar|side-bar|menu|navbar|nav-|footer|masthead|header|"
+    r"share|social|comment|related|promo|advert|\bads?\b|sponsor|popup|modal|newsletter|subscribe|skip-link",
+    re.I
+)
+LIKELY = re.compile(r"article|content|main|post|entry|body|story|text|docs?|markdown|prose", re.I)
+
+# Elements whose text counts toward their container's score
+SCORED_TAGS = {"p", "pre", "td", "blockquote", "li", "dd", "h1", "h2", "h3", "h4", "code"}
+
+def _class_and_id(node: Node) -> str:
+    return f"{node.attrs.get('class', '')} {node.attrs.get('id', '')}"
+
+def _is_boilerplate(node: Node) -> bool:
+    if node.tag in BOILERPLATE_TAGS or node.attrs.get("role") in BOILERPLATE_ROLES:
+        return True
+    if node.attrs.get("aria-hidden") == "true" or "hidden" in node.attrs:
+        return True
+    if node.tag in PAGE_FRAME_TAGS:
+        ancestor = node.parent
+        while ancestor is not None:
+            if ancestor.tag in CONTENT_TAGS:
+                return False
+            ancestor = ancestor.parent
+        return True
+    if node.tag in {"html", "body"} | CONTENT_TAGS:
+        return False
+    names = _class_and_id(node)
+    return bool(UNLIKELY.search(names)) and not LIKELY.search(names)
+
+def _remove_boilerplate(root: Node):
+    # Collect first: removing while walking would skip siblings
+    for node in [node for node in root.iter() if node is not root and _is_boilerplate(node)]:
+        node.remove()
+
+def _link_density(node: Node, text_length: int) -> float:
+    if not text_length:
+        return 0.0
+    link_length = sum(len(node_text(link)) for link in node.iter() if link.tag == "a")
+    return min(1.0, link_length / text_length)
+
+def _best_by_density(root: Node) -> Optional[Node]:
+    """
+    Readability-style pick of the element holding the main text: each text
+    block scores its parent, and half as much its grandparent, by length and
+    commas; scores are then cut by link density and nudged by class names.
+    """
+    scores: Dict[int, float] = {}
+    nodes: Dict[int, Node] = {}
+    for node in root.iter():
+        if node.tag not in SCORED_TAGS or node.parent is None:
+            continue
+        text = node_text(node)
+        if len(text) < 25:
+            continue
+        score = 1 + text.count(",") + min(len(text) / 100, 3)
+        for ancestor, share in ((node.parent, 1.0), (node.parent.parent, 0.5)):
+            if ancestor is None or ancestor is root:
+                continue
+            if id(ancestor) not in scores:
+                nodes[id(ancestor)] = ancestor
+                names = _class_and_id(ancestor)
+                scores[id(ancestor)] = (25 if LIKELY.search(names) else 0) + (25 if ancestor.tag in CONTENT_TAGS else 0)
+            scores[id(ancestor)] += score * share
+
+    best, best_score = None, 0.0
+    for key, score in scores.items():
+        node = nodes[key]
+        score *= 1 - _link_density(node, len(node_text(node)))
+        if score > best_score:
+            best, best_score = node, score
+    return best
+
+def _report(text: str, method: str, original_chars: int) -> Dict[str, Any]:
+    return {
+        "text": text,
+        "method": method,
+        "original_chars": original_chars,
+        "content_chars": len(text),
+        "stripped_chars": max(0, original_chars - len(text))
+    }
+
+def extract_main_content(
+    html: str,
+    include_selectors: Optional[str] = None,
+    exclude_selectors: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Strip navigation, headers, footers, cookie banners and other boilerplate
+    from a page and keep its main text. Elements matching exclude_selectors
+    are always dropped; when include_selectors match, only their text is
+    kept. Otherwise the content is a <main>/<article> element or the
+    densest text block, falling back to the whole cleaned page when neither
+    holds CONTENT_MIN_CHARS. Returns {"text", "method", "original_chars",
+    "content_chars", "stripped_chars"}.
+    """
+    root = parse_tree(html)
+    original_chars = len(node_text(root))
+
+    for node in select(root, parse_selectors(exclude_selectors)):
+        node.remove()
+    # The bot's own selectors override the heuristics
+    included = select(root, parse_selectors(include_selectors))
+    text = "\n".join(node_text(node) for node in included)
+    if text:
+        return _report(text, "selectors", original_chars)
+
+    _remove_boilerplate(root)
+    main = select(root, parse_selectors("main, article, [role=main]"))
+    text, method = "\n".join(node_text(node) for node in main), "main"
+    if len(text) < settings.CONTENT_MIN_CHARS:
+        best = _best_by_density(root)
+        text, method = (node_text(best) if best is not None else ""), "density"
+    if len(text) < settings.CONTENT_MIN_CHARS:
+        text, method = node_text(root), "page"
+    return _report(text, method, original_chars)
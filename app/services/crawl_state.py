@@ -0,0 +1,37 @@
+from typing import Optional, Dict
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.models.crawl_state import CrawlState
+
+def get_crawl_state(db: Session, chatbot_id: int, url: str) -> Optional[CrawlState]:
+    return db.query(CrawlState).filter(CrawlState.chatbot_id == chatbot_id, CrawlState.url == url).first()
+
+def conditional_headers(state: Optional[CrawlState]) -> Optional[Dict[str, str]]:
+    """If-None-Match / If-Modified-Since headers for re-fetching a page that was indexed before"""
+    if state is None or not state.content_hash:
+        return None
+    headers = {}
+    if state.etag:
+        headers["If-None-Match"] = state.etag
+    if state.last_modified:
+        headers["If-Modified-Since"] = state.last_modified
+    return headers or None
+
+def save_crawl_state(db: Session, chatbot_id: int, url: str, **fields) -> CrawlState:
+    """Create or update the crawl state of a bot's page"""
+    state = get_crawl_state(db, chatbot_id, url)
+    if state is None:
+        state = CrawlState(chatbot_id=chatbot_id, url=url)
+        db.add(state)
+    for field, value in fields.items():
+        setattr(state, field, value)
+    try:
+        db.commit()
+    except IntegrityError:
+        # Another crawl of the same bot stored the page first
+        db.rollback()
+        state = get_crawl_state(db, chatbot_id, url)
+        for field, value in fields.items():
+            setattr(state, field, value)
+        db.commit()
+    return state
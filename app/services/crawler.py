@@ -0,0 +1,143 @@
+from collections import OrderedDict
+from typing import Optional, Dict, Any
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+from app.core.config import settings
+from app.core.selenium import DriverPoolTimeout
+from app.services.fetcher import fetch_bytes, fetch_page
+import asyncio
+import httpx
+import random
+import time
+
+# Statuses worth retrying; everything else fails the page at once
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class DisallowedByRobots(ValueError):
+    """The site's robots.txt does not allow fetching the URL."""
+
+class TokenBucket:
+    """Allows rate requests per second on average, with bursts of up to capacity."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class _Host:
+    def __init__(self):
+        self.semaphore = asyncio.Semaphore(settings.CRAWL_HOST_CONCURRENCY)
+        self.bucket = TokenBucket(settings.CRAWL_HOST_RATE, settings.CRAWL_HOST_BURST)
+        self.robots: Optional[RobotFileParser] = None
+        self.robots_expires = 0.0
+        self.robots_lock = asyncio.Lock()
+
+class CrawlScheduler:
+    """
+    Paces page fetches per host: at most CRAWL_HOST_CONCURRENCY requests in
+    flight and CRAWL_HOST_RATE requests per second (a token bucket, slowed
+    further by robots.txt Crawl-delay or Request-rate), skipping URLs that
+    robots.txt disallows. Transient failures (connection errors, 429, 5xx,
+    no free WebDriver) are retried with exponential backoff. Waiting only
+    suspends the page's own task, so other hosts and requests keep going.
+
+    One scheduler is shared by every crawl of the process, so concurrent
+    jobs for the same site share its budget.
+    """
+
+    def __init__(self, max_hosts: int = 1000):
+        self.max_hosts = max_hosts
+        self._hosts: "OrderedDict[str, _Host]" = OrderedDict()
+
+    def _host(self, origin: str) -> _Host:
+        host = self._hosts.get(origin)
+        if host is None:
+            host = self._hosts[origin] = _Host()
+            # Forget the least recently crawled hosts; in-flight fetches keep their own reference
+            while len(self._hosts) > self.max_hosts:
+                self._hosts.popitem(last=False)
+        self._hosts.move_to_end(origin)
+        return host
+
+    async def _load_robots(self, origin: str, host: _Host) -> RobotFileParser:
+        async with host.robots_lock:
+            if host.robots is not None and host.robots_expires > time.monotonic():
+                return host.robots
+            robots = RobotFileParser(f"{origin}/robots.txt")
+            try:
+                response, body = await fetch_bytes(robots.url, settings.CRAWL_ROBOTS_MAX_BYTES)
+                robots.parse(body.decode(response.encoding or "utf-8", errors="replace").splitlines())
+            except Exception as e:
+                # A missing or unreadable robots.txt places no restrictions
+                if not (isinstance(e, httpx.HTTPStatusError) and 400 <= e.response.status_code < 500):
+                    print(f"Error reading {robots.url}: {str(e)}")
+                robots.parse([])
+
+            # robotparser matches only the product token, not the full User-Agent header
+            agent = settings.CRAWL_ROBOTS_USER_AGENT
+            rate = settings.CRAWL_HOST_RATE
+            delay = robots.crawl_delay(agent)
+            if delay:
+                rate = min(rate, 1 / float(delay))
+            request_rate = robots.request_rate(agent)
+            if request_rate and request_rate.requests:
+                rate = min(rate, request_rate.requests / request_rate.seconds)
+            if rate < settings.CRAWL_HOST_RATE:
+                # A site asking for a delay gets one request per interval, without bursts
+                host.bucket = TokenBucket(rate, 1)
+
+            host.robots = robots
+            host.robots_expires = time.monotonic() + settings.CRAWL_ROBOTS_TTL_SECONDS
+            return robots
+
+    @staticmethod
+    def _retry_delay(error: Exception, attempt: int) -> Optional[float]:
+        """Seconds to wait before retrying after error, or None when it is not transient."""
+        if isinstance(error, httpx.HTTPStatusError):
+            if error.response.status_code not in RETRY_STATUSES:
+                return None
+            retry_after = error.response.headers.get("retry-after", "")
+            if retry_after.isdigit():
+                return min(float(retry_after), settings.CRAWL_MAX_RETRY_DELAY_SECONDS)
+        elif not isinstance(error, (httpx.TransportError, DriverPoolTimeout)):
+            return None
+        delay = settings.CRAWL_RETRY_BASE_DELAY_SECONDS * 2 ** attempt
+        # Jitter keeps retries of a batch from hitting the host at the same moment
+        return min(delay * random.uniform(0.5, 1.5), settings.CRAWL_MAX_RETRY_DELAY_SECONDS)
+
+    async def fetch(self, url: str, render_mode: Optional[str] = None, headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """fetch_page, paced for the URL's host. Raises DisallowedByRobots for disallowed URLs."""
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}".lower()
+        host = self._host(origin)
+        robots = await self._load_robots(origin, host)
+        if not robots.can_fetch(settings.CRAWL_ROBOTS_USER_AGENT, url):
+            raise DisallowedByRobots("Disallowed by robots.txt")
+
+        attempt = 0
+        while True:
+            async with host.semaphore:
+                await host.bucket.acquire()
+                try:
+                    return await fetch_page(url, render_mode, headers)
+                except Exception as e:
+                    delay = self._retry_delay(e, attempt)
+                    if delay is None or attempt >= settings.CRAWL_MAX_RETRIES:
+                        raise
+            # Back off without holding the host's slot
+            attempt += 1
+            await asyncio.sleep(delay)
+
+# Create a singleton instance
+crawl_scheduler = CrawlScheduler()
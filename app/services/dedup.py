@@ -0,0 +1,197 @@
+from typing import Optional, Dict, Any, List, Iterable, Iterator, Tuple
+from collections import Counter
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+import hashlib
+import re
+import numpy as np
+from app.core.config import settings
+from app.models.document_fingerprint import DocumentFingerprint
+from app.services.embedding_cache import normalize_text
+
+FINGERPRINT_BITS = 64
+BAND_COUNT = 4
+BAND_BITS = FINGERPRINT_BITS // BAND_COUNT
+SHINGLE_SIZE = 3
+
+def _shingles(text: str) -> List[str]:
+    words = re.findall(r"\w+", normalize_text(text).lower())
+    if len(words) < settings.DEDUP_MIN_WORDS:
+        return []
+    return [' '.join(words[i:i + SHINGLE_SIZE]) for i in range(max(1, len(words) - SHINGLE_SIZE + 1))]
+
+def simhash(text: str) -> Optional[int]:
+    """
+    64-bit SimHash over word 3-shingles. Texts that differ in a few words get
+    fingerprints a few bits apart. Returns None for texts too short to compare
+    reliably (fewer than DEDUP_MIN_WORDS words).
+    """
+    counts = Counter(_shingles(text))
+    if not counts:
+        return None
+    hashes = np.array(
+        [int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'big') for shingle in counts],
+        dtype='>u8'
+    )
+    # One row of 64 bits per shingle, most significant bit first
+    bits = np.unpackbits(hashes.view(np.uint8).reshape(-1, 8), axis=1).astype(np.int64)
+    weights = np.array(list(counts.values()), dtype=np.int64) @ (2 * bits - 1)
+    return int.from_bytes(np.packbits(weights > 0).tobytes(), 'big')
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+def fingerprint_bands(fingerprint: int) -> Tuple[int, ...]:
+    """
+    Split a fingerprint into BAND_COUNT slices. Fingerprints at most
+    BAND_COUNT - 1 bits apart always share at least one slice exactly.
+    """
+    mask = (1 << BAND_BITS) - 1
+    return tuple((fingerprint >> (BAND_BITS * band)) & mask for band in range(BAND_COUNT))
+
+def _to_signed(fingerprint: int) -> int:
+    # Postgres BIGINT is signed
+    return fingerprint - (1 << FINGERPRINT_BITS) if fingerprint >= 1 << (FINGERPRINT_BITS - 1) else fingerprint
+
+def _to_unsigned(fingerprint: int) -> int:
+    return fingerprint & ((1 << FINGERPRINT_BITS) - 1)
+
+class NearDuplicateFilter:
+    """
+    Drops (content, metadata) items whose SimHash is within max_distance bits
+    of a chunk already stored for the bot, or of an earlier item in the same
+    stream, before they are embedded. Candidates are found through the band
+    columns of document_fingerprints (one query per batch), so only a few
+    rows are compared per chunk.
+
+    Call record() with the store results of the kept items to add their
+    fingerprints to the bot's index. Filters of one ingestion, e.g. the files
+    of an archive, can share `seen` to drop near-duplicates across documents
+    as they stream, before any of them is recorded.
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        chatbot_id: int,
+        max_distance: Optional[int] = None,
+        batch_size: int = 200,
+        exclude_parent_id: Optional[str] = None,
+        seen: Optional[Dict[Tuple[int, int], List[int]]] = None
+    ):
+        self.db = db
+        self.chatbot_id = chatbot_id
+        # Re-ingesting a source must not match the source's own previous chunks
+        self.exclude_parent_id = exclude_parent_id
+        self.max_distance = min(settings.DEDUP_MAX_DISTANCE if max_distance is None else max_distance, BAND_COUNT - 1)
+        self.batch_size = batch_size
+        self.skipped = 0
+        # Fingerprint of every yielded item, in order (None when too short to fingerprint)
+        self.kept: List[Optional[int]] = []
+        # Stored candidates are per filter, since each excludes its own parent's chunks
+        self._index: Dict[Tuple[int, int], List[int]] = {}
+        # Kept items of this stream and of the filters sharing it
+        self._seen: Dict[Tuple[int, int], List[int]] = {} if seen is None else seen
+
+    @staticmethod
+    def _add(index: Dict[Tuple[int, int], List[int]], fingerprint: int):
+        for band, value in enumerate(fingerprint_bands(fingerprint)):
+            index.setdefault((band, value), []).append(fingerprint)
+
+    def _is_duplicate(self, fingerprint: int) -> bool:
+        for band, value in enumerate(fingerprint_bands(fingerprint)):
+            for index in (self._index, self._seen):
+                for other in index.get((band, value), ()):
+                    if hamming_distance(fingerprint, other) <= self.max_distance:
+                        return True
+        return False
+
+    def _load_candidates(self, fingerprints: List[int]):
+        if not fingerprints:
+            return
+        band_values = list(zip(*(fingerprint_bands(fingerprint) for fingerprint in fingerprints)))
+        columns = [DocumentFingerprint.band0, DocumentFingerprint.band1, DocumentFingerprint.band2, DocumentFingerprint.band3]
+        query = self.db.query(DocumentFingerprint.fingerprint)\
+            .filter(
+                DocumentFingerprint.chatbot_id == self.chatbot_id,
+                or_(*(column.in_(set(values)) for column, values in zip(columns, band_values)))
+            )
+        if self.exclude_parent_id:
+            query = query.filter(or_(
+                DocumentFingerprint.parent_id.is_(None),
+                DocumentFingerprint.parent_id != self.exclude_parent_id
+            ))
+        rows = query.all()
+        for (fingerprint,) in rows:
+            self._add(self._index, _to_unsigned(fingerprint))
+
+    def filter(self, items: Iterable[Tuple]) -> Iterator[Tuple]:
+        batch = []
+        for item in items:
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                yield from self._filter_batch(batch)
+                batch = []
+        if batch:
+            yield from self._filter_batch(batch)
+
+    def _filter_batch(self, batch: List[Tuple]) -> Iterator[Tuple]:
+        fingerprints = [simhash(item[0]) for item in batch]
+        self._load_candidates([fingerprint for fingerprint in fingerprints if fingerprint is not None])
+        for item, fingerprint in zip(batch, fingerprints):
+            if fingerprint is not None:
+                if self._is_duplicate(fingerprint):
+                    self.skipped += 1
+                    continue
+                self._add(self._seen, fingerprint)
+            self.kept.append(fingerprint)
+            yield item
+
+    def forget(self, chunk_ids: List[str]):
+        """Drop the fingerprints of chunks that were deleted or are being replaced."""
+        if not chunk_ids:
+            return
+        self.db.query(DocumentFingerprint)\
+            .filter(DocumentFingerprint.chatbot_id == self.chatbot_id, DocumentFingerprint.chunk_id.in_(chunk_ids))\
+            .delete(synchronize_session=False)
+        self.db.commit()
+
+    def record(self, parent_id: str, results: List[Dict[str, Any]]):
+        """
+        Store the fingerprints of the kept items that were indexed
+        successfully, replacing those of chunks stored under the same id.
+        """
+        self.forget([result["id"] for result in results if result["status"] == "success" and result["id"]])
+        rows = []
+        for fingerprint, result in zip(self.kept, results):
+            if fingerprint is None or result["status"] != "success":
+                continue
+            band0, band1, band2, band3 = fingerprint_bands(fingerprint)
+            rows.append(DocumentFingerprint(
+                chatbot_id=self.chatbot_id,
+                fingerprint=_to_signed(fingerprint),
+                band0=band0,
+                band1=band1,
+                band2=band2,
+                band3=band3,
+                parent_id=parent_id,
+                chunk_id=result["id"]
+            ))
+        if rows:
+            self.db.add_all(rows)
+            self.db.commit()
+
+def create_duplicate_filter(
+    db: Session,
+    chatbot_id: int,
+    parent_id: Optional[str] = None,
+    seen: Optional[Dict[Tuple[int, int], List[int]]] = None
+) -> Optional[NearDuplicateFilter]:
+    """
+    Near-duplicate filter for ingesting a document into a bot, or None when
+    DEDUP_ENABLED is off. The document's own earlier chunks are not duplicates.
+    seen is shared by the filters of documents ingested together.
+    """
+    if not settings.DEDUP_ENABLED:
+        return None
+    return NearDuplicateFilter(db, chatbot_id, batch_size=settings.BULK_CHUNK_SIZE, exclude_parent_id=parent_id, seen=seen)
@@ -1,49 +1,329 @@
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Iterable, Iterator, AsyncIterable, Tuple, Union, Callable, Awaitable
+from starlette.concurrency import iterate_in_threadpool
 from sqlalchemy.orm import Session
 from app.models.chatbot import Chatbot
 from app.schemas.document import DocumentCreate, Document
-from app.services.elasticsearch import add_document, search_documents
+from app.core.config import settings
+from app.services.elasticsearch import (
+    bulk_add_documents,
+    bulk_add_documents_async,
+    get_source_hashes,
+    get_source_hashes_async,
+    delete_documents,
+    delete_documents_async,
+    search_documents
+)
+from app.services.embedding_cache import make_cache_key
+from app.services.chunking import iter_chunks
+from app.services.dedup import create_duplicate_filter
 from datetime import datetime
+import asyncio
+import hashlib
+import uuid
 
-def create_document(db: Session, document: DocumentCreate) -> Document:
+def _get_chatbot_with_index(db: Session, chatbot_id: int) -> Chatbot:
     """
-    Create a new document in Elasticsearch for a specific chatbot
+    Get a chatbot and verify it has an associated index
     """
-    # Get chatbot to verify it exists and get its index_id
-    chatbot = db.query(Chatbot).filter(Chatbot.id == document.chatbot_id).first()
+    chatbot = db.query(Chatbot).filter(Chatbot.id == chatbot_id).first()
     if not chatbot:
-        raise ValueError(f"Chatbot with id {document.chatbot_id} not found")
+        raise ValueError(f"Chatbot with id {chatbot_id} not found")
     
     if not chatbot.index_id:
         raise ValueError(f"Chatbot {chatbot.id} does not have an associated index")
     
-    # Add document to Elasticsearch
-    doc_id = add_document(
-        index_id=chatbot.index_id,
-        content=document.content,
-        metadata=document.metadata
-    )
+    return chatbot
+
+def _iter_chunk_items(
+    sections: Iterable[Dict[str, Any]],
+    metadata: Optional[Dict[str, Any]],
+    parent_id: str
+) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Chunk a document lazily, attaching the parent and position metadata to every chunk
+    """
+    for index, chunk in enumerate(iter_chunks(sections)):
+        location = {key: value for key, value in chunk.items() if key != "text"}
+        yield chunk["text"], {
+            **(metadata or {}),
+            **location,
+            "parent_id": parent_id,
+            "chunk_index": index
+        }
+
+def _parent_id(source: Optional[str]) -> str:
+    # Stable for a source, so re-ingestion updates the same document
+    return hashlib.sha1(source.encode("utf-8")).hexdigest() if source else uuid.uuid4().hex
+
+def _chunk_id(source: str, chunk_index: int) -> str:
+    return hashlib.sha1(f"{source}#{chunk_index}".encode("utf-8")).hexdigest()
+
+class _ChunkSync:
+    """
+    One ingestion of a document. With a source, chunks get deterministic ids
+    and a content hash; chunks whose hash matches what is stored under their
+    id are not embedded again, and stored chunks the new version no longer
+    produces are deleted afterwards. Near-duplicates of other content are
+    dropped before embedding.
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        chatbot: Chatbot,
+        parent_id: str,
+        source: Optional[str],
+        existing: Dict[str, str],
+        seen: Optional[Dict[Tuple[int, int], List[int]]] = None
+    ):
+        self.parent_id = parent_id
+        self.source = source
+        self.existing = existing
+        self.unchanged_ids = set()
+        self.attempted_ids = set()
+        self.duplicates = create_duplicate_filter(db, chatbot.id, parent_id, seen)
+
+    @property
+    def skipped(self) -> int:
+        return self.duplicates.skipped if self.duplicates else 0
+
+    def items(self, items: Iterator[Tuple[str, Dict[str, Any]]]) -> Iterator[tuple]:
+        if self.source:
+            items = self._changed(items)
+        if self.duplicates:
+            items = self.duplicates.filter(items)
+        if self.source:
+            items = self._track(items)
+        return items
+
+    def _changed(self, items: Iterator[Tuple[str, Dict[str, Any]]]) -> Iterator[tuple]:
+        for content, metadata in items:
+            chunk_id = _chunk_id(self.source, metadata["chunk_index"])
+            content_hash = make_cache_key(settings.EMBEDDING_MODEL_NAME, content)
+            if self.existing.get(chunk_id) == content_hash:
+                self.unchanged_ids.add(chunk_id)
+                continue
+            yield content, metadata, {"id": chunk_id, "source": self.source, "content_hash": content_hash}
+
+    def _track(self, items: Iterator[tuple]) -> Iterator[tuple]:
+        for item in items:
+            self.attempted_ids.add(item[2]["id"])
+            yield item
+
+    def stale_ids(self) -> List[str]:
+        """Stored chunks of the source that this version did not keep or rewrite"""
+        return [
+            chunk_id for chunk_id in self.existing
+            if chunk_id not in self.unchanged_ids and chunk_id not in self.attempted_ids
+        ]
+
+    def finish(self, results: List[Dict[str, Any]], deleted_ids: List[str]):
+        if self.duplicates:
+            self.duplicates.record(self.parent_id, results)
+            self.duplicates.forget(deleted_ids)
+
+    def parent_document(
+        self,
+        chatbot_id: int,
+        content: str,
+        metadata: Optional[Dict[str, Any]],
+        results: List[Dict[str, Any]],
+        deleted: int
+    ) -> Document:
+        """
+        Describe the stored chunks as one parent document. A document whose
+        chunks were all unchanged or skipped as near-duplicates is not an error.
+        """
+        failed = [result for result in results if result["status"] != "success"]
+        if not results and not self.skipped and not self.unchanged_ids:
+            raise RuntimeError("Could not index document: no text to index")
+        if results and len(failed) == len(results):
+            raise RuntimeError(f"Could not index document: {failed[0]['error']}")
+        if failed:
+            print(f"Failed to index {len(failed)} of {len(results)} chunks: {failed[0]['error']}")
+        return Document(
+            id=self.parent_id,
+            chatbot_id=chatbot_id,
+            content=content,
+            metadata=metadata,
+            source=self.source,
+            chunk_count=len(results) - len(failed),
+            skipped_chunks=self.skipped,
+            unchanged_chunks=len(self.unchanged_ids),
+            deleted_chunks=deleted,
+            created_at=datetime.utcnow()
+        )
+
+def create_document(db: Session, document: DocumentCreate, sections: Optional[List[Dict[str, Any]]] = None) -> Document:
+    """
+    Create a new document for a specific chatbot, stored as token-sized chunks.
+    sections, as returned by extract_sections_from_file, keeps page and slide
+    boundaries; otherwise document.content is chunked as a single section.
+    Ingesting a source again only re-indexes the chunks that changed.
+    """
+    # Get chatbot to verify it exists and get its index_id
+    chatbot = _get_chatbot_with_index(db, document.chatbot_id)
+    
+    parent_id = _parent_id(document.source)
+    existing = get_source_hashes(chatbot.index_id, document.source) if document.source else {}
+    sync = _ChunkSync(db, chatbot, parent_id, document.source, existing)
+    items = _iter_chunk_items(sections or [{"text": document.content}], document.metadata, parent_id)
+    
+    # Add every new or changed chunk to the bot's index in bulk
+    results = bulk_add_documents(chatbot.index_id, sync.items(items))
+    
+    stale_ids = sync.stale_ids()
+    deleted = delete_documents(chatbot.index_id, stale_ids)
+    sync.finish(results, stale_ids)
+    return sync.parent_document(document.chatbot_id, document.content, document.metadata, results, deleted)
+
+async def _index_chunks_async(
+    db: Session,
+    chatbot: Chatbot,
+    parent_id: str,
+    source: Optional[str],
+    items: Iterator[Tuple[str, Dict[str, Any]]]
+) -> Tuple[_ChunkSync, List[Dict[str, Any]], int]:
+    """
+    Embed and index the new and changed chunks, pulling them in a worker
+    thread, then delete the source's stale chunks. Returns the sync state,
+    the store results and the number of deleted chunks.
+    """
+    existing = await get_source_hashes_async(chatbot.index_id, source) if source else {}
+    sync = _ChunkSync(db, chatbot, parent_id, source, existing)
+    
+    results = await bulk_add_documents_async(chatbot.index_id, iterate_in_threadpool(sync.items(items)))
+    
+    stale_ids = sync.stale_ids()
+    deleted = await delete_documents_async(chatbot.index_id, stale_ids)
+    await asyncio.to_thread(sync.finish, results, stale_ids)
+    return sync, results, deleted
+
+async def create_document_async(
+    db: Session,
+    document: DocumentCreate,
+    sections: Optional[List[Dict[str, Any]]] = None
+) -> Document:
+    """
+    Create a new document for a specific chatbot, chunking and embedding it off the event loop
+    """
+    chatbot = await asyncio.to_thread(_get_chatbot_with_index, db, document.chatbot_id)
+    
+    parent_id = _parent_id(document.source)
+    items = _iter_chunk_items(sections or [{"text": document.content}], document.metadata, parent_id)
+    sync, results, deleted = await _index_chunks_async(db, chatbot, parent_id, document.source, items)
+    
+    return sync.parent_document(document.chatbot_id, document.content, document.metadata, results, deleted)
+
+async def create_document_from_sections_async(
+    db: Session,
+    chatbot_id: int,
+    sections: Iterable[Dict[str, Any]],
+    metadata: Optional[Dict[str, Any]] = None,
+    source: Optional[str] = None
+) -> Document:
+    """
+    Create a document from sections produced while it is indexed, e.g.
+    iter_text_sections over a large PDF. Sections are pulled in a worker
+    thread, so the first chunks are embedded and indexed while later pages
+    are still being extracted. The returned content is only the first
+    DOCUMENT_PREVIEW_CHARS characters; metadata["original_size"] has the full length.
+    """
+    chatbot = await asyncio.to_thread(_get_chatbot_with_index, db, chatbot_id)
+    
+    parent_id = _parent_id(source)
+    # Only the start of the text is kept as the document's content, so memory does not grow with the file
+    preview = ""
+    size = 0
+    
+    def record(sections: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        nonlocal preview, size
+        for index, section in enumerate(sections):
+            text = ('\n' if index else '') + section["text"]
+            if len(preview) < settings.DOCUMENT_PREVIEW_CHARS:
+                preview += text[:settings.DOCUMENT_PREVIEW_CHARS - len(preview)]
+            size += len(text)
+            yield section
+    
+    items = _iter_chunk_items(record(sections), metadata, parent_id)
+    sync, results, deleted = await _index_chunks_async(db, chatbot, parent_id, source, items)
     
-    # Create and return document object
-    return Document(
-        id=doc_id,
-        chatbot_id=document.chatbot_id,
-        content=document.content,
-        metadata=document.metadata,
-        created_at=datetime.utcnow()
+    return sync.parent_document(
+        chatbot_id, preview, {**(metadata or {}), "original_size": size}, results, deleted
     )
 
+async def create_documents_async(
+    db: Session,
+    chatbot_id: int,
+    documents: AsyncIterable[Tuple[DocumentCreate, List[Dict[str, Any]]]],
+    on_document: Optional[Callable[[int, Union[Document, Exception]], Awaitable[None]]] = None
+) -> List[Union[Document, Exception]]:
+    """
+    Create many documents of one chatbot through a single embedding and
+    indexing pipeline, so bulk batches span documents. documents yields
+    (document, sections) pairs and is consumed while earlier chunks are being
+    indexed; near-duplicates are dropped across all of them. Returns, per
+    document in order, the Document or the exception that prevented storing
+    it. on_document is awaited with the position and outcome of each document
+    as soon as all of its chunks are stored.
+    """
+    chatbot = await asyncio.to_thread(_get_chatbot_with_index, db, chatbot_id)
+    # Finished documents commit, which expires the chatbot; reading it again would query on the event loop
+    index_id = chatbot.index_id
+    entries: List[Tuple[DocumentCreate, _ChunkSync]] = []
+    # Items handed to the pipeline up to the end of each document, in order
+    ends: List[int] = []
+    produced = 0
+    # Fingerprints kept so far, shared by the duplicate filters of every document
+    seen: Dict[Tuple[int, int], List[int]] = {}
+    
+    async def items():
+        nonlocal produced
+        async for document, sections in documents:
+            parent_id = _parent_id(document.source)
+            existing = await get_source_hashes_async(index_id, document.source) if document.source else {}
+            sync = await asyncio.to_thread(_ChunkSync, db, chatbot, parent_id, document.source, existing, seen)
+            entries.append((document, sync))
+            chunks = _iter_chunk_items(sections or [{"text": document.content}], document.metadata, parent_id)
+            async for item in iterate_in_threadpool(sync.items(chunks)):
+                produced += 1
+                yield item
+            ends.append(produced)
+    
+    results: List[Dict[str, Any]] = []
+    created: List[Union[Document, Exception]] = []
+    
+    async def finish_stored():
+        # Results come back in item order, so documents complete in order
+        while len(created) < len(ends) and len(results) >= ends[len(created)]:
+            position = len(created)
+            document, sync = entries[position]
+            document_results = results[ends[position - 1] if position else 0:ends[position]]
+            try:
+                stale_ids = sync.stale_ids()
+                deleted = await delete_documents_async(index_id, stale_ids)
+                await asyncio.to_thread(sync.finish, document_results, stale_ids)
+                created.append(sync.parent_document(chatbot_id, document.content, document.metadata, document_results, deleted))
+            except Exception as e:
+                created.append(e)
+            if on_document:
+                await on_document(position, created[-1])
+    
+    async def on_batch(batch_results: List[Dict[str, Any]]):
+        results.extend(batch_results)
+        await finish_stored()
+    
+    await bulk_add_documents_async(index_id, items(), on_batch=on_batch)
+    # Documents without chunks to store after the last batch
+    await finish_stored()
+    return created
+
 def search_documents_for_chatbot(db: Session, chatbot_id: int, query: str, size: int = 10) -> list[Dict[str, Any]]:
     """
     Search documents for a specific chatbot using semantic search
     """
     # Get chatbot to verify it exists and get its index_id
-    chatbot = db.query(Chatbot).filter(Chatbot.id == chatbot_id).first()
-    if not chatbot:
-        raise ValueError(f"Chatbot with id {chatbot_id} not found")
-    
-    if not chatbot.index_id:
-        raise ValueError(f"Chatbot {chatbot.id} does not have an associated index")
+    chatbot = _get_chatbot_with_index(db, chatbot_id)
     
     # Search documents in Elasticsearch
     return search_documents(
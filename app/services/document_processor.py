@@ -1,41 +1,243 @@
-from typing import Optional
+from typing import Optional, List, Dict, Any, Union, BinaryIO, Iterator, Tuple
+from concurrent.futures import ProcessPoolExecutor
 import docx
 from pptx import Presentation
-from pdfminer.high_level import extract_text
+from pdfminer.converter import TextConverter
+from pdfminer.layout import LAParams
+from pdfminer.pdfinterp import PDFResourceManager, PDFPageInterpreter
+from pdfminer.pdfpage import PDFPage
+from app.core.config import settings
+from app.services.extraction_cache import ExtractionCache, hash_file
+import asyncio
+import contextlib
+import hashlib
+import io
+import multiprocessing
 import os
+import threading
 
-def extract_text_from_file(file_path: str, file_type: str) -> Optional[str]:
+SUPPORTED_FILE_TYPES = ['docx', 'pptx', 'pdf', 'txt']
+
+_extraction_pool: Optional[ProcessPoolExecutor] = None
+_extraction_pool_lock = threading.Lock()
+
+def get_extraction_pool() -> Optional[ProcessPoolExecutor]:
     """
-    Extract text content from different types of files
+    Get the pool of processes extracting PDF page ranges, or None when
+    EXTRACTION_WORKERS is 0
+    """
+    global _extraction_pool
+    if settings.EXTRACTION_WORKERS <= 0:
+        return None
+    if _extraction_pool is None:
+        with _extraction_pool_lock:
+            if _extraction_pool is None:
+                _extraction_pool = ProcessPoolExecutor(
+                    max_workers=settings.EXTRACTION_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+    return _extraction_pool
+
+_extraction_cache: Optional[ExtractionCache] = None
+
+def get_extraction_cache() -> Optional[ExtractionCache]:
+    """
+    Get the extraction cache, or None when EXTRACTION_CACHE_PATH is unset
+    """
+    global _extraction_cache
+    if not settings.EXTRACTION_CACHE_PATH:
+        return None
+    if _extraction_cache is None:
+        with _extraction_pool_lock:
+            if _extraction_cache is None:
+                _extraction_cache = ExtractionCache(settings.EXTRACTION_CACHE_PATH, settings.EXTRACTION_CACHE_MAX_BYTES)
+    return _extraction_cache
+
+def shutdown_extraction_pool():
+    global _extraction_pool
+    with _extraction_pool_lock:
+        if _extraction_pool is not None:
+            _extraction_pool.shutdown(cancel_futures=True)
+            _extraction_pool = None
+
+def _open_binary(source: Union[str, BinaryIO]):
+    if isinstance(source, str):
+        return open(source, 'rb')
+    source.seek(0)
+    # Leave caller-owned buffers open
+    return contextlib.nullcontext(source)
+
+def _iter_pdf_pages(source: Union[str, BinaryIO], start: int = 0, stop: Optional[int] = None) -> Iterator[Tuple[int, str]]:
+    """
+    Yield (page number, text) for pages [start, stop), laying out one page at
+    a time with the same settings as pdfminer's extract_text
     """
+    with _open_binary(source) as file:
+        manager = PDFResourceManager()
+        output = io.StringIO()
+        device = TextConverter(manager, output, laparams=LAParams())
+        interpreter = PDFPageInterpreter(manager, device)
+        try:
+            for index, page in enumerate(PDFPage.get_pages(file)):
+                if index < start:
+                    continue
+                if stop is not None and index >= stop:
+                    break
+                interpreter.process_page(page)
+                yield index + 1, output.getvalue().rstrip('\f')
+                output.seek(0)
+                output.truncate(0)
+        finally:
+            device.close()
+
+def _extract_pdf_range(file_path: str, start: int, stop: int) -> List[Tuple[int, str]]:
+    """Extract a page range in a worker process"""
+    return list(_iter_pdf_pages(file_path, start, stop))
+
+def _count_pdf_pages(file_path: str) -> int:
+    with open(file_path, 'rb') as file:
+        return sum(1 for _ in PDFPage.get_pages(file))
+
+def _iter_pdf_sections(source: Union[str, BinaryIO]) -> Iterator[Tuple[int, str]]:
+    pool = get_extraction_pool() if isinstance(source, str) else None
+    page_count = _count_pdf_pages(source) if pool else 0
+    if not pool or page_count < settings.EXTRACTION_PARALLEL_MIN_PAGES:
+        yield from _iter_pdf_pages(source)
+        return
+
+    # Spread page ranges over the pool and hand them back in page order as they finish
+    step = settings.EXTRACTION_PAGES_PER_TASK
+    futures = [
+        pool.submit(_extract_pdf_range, source, start, min(start + step, page_count))
+        for start in range(0, page_count, step)
+    ]
     try:
-        if file_type == 'docx':
-            doc = docx.Document(file_path)
-            return '\n'.join([paragraph.text for paragraph in doc.paragraphs])
-        
-        elif file_type == 'pptx':
-            prs = Presentation(file_path)
+        for future in futures:
+            yield from future.result()
+    finally:
+        for future in futures:
+            future.cancel()
+
+def iter_sections(file_path: Union[str, BinaryIO], file_type: str) -> Iterator[Dict[str, Any]]:
+    """
+    Read a file, given as a path or a binary file-like object, one section at
+    a time: {"text": ..., plus "page" or "slide" when known}. PDFs and slide
+    decks are yielded page by page, so consumers can start before the whole
+    file is read.
+    """
+    if file_type == 'docx':
+        doc = docx.Document(file_path)
+        yield {"text": '\n'.join([paragraph.text for paragraph in doc.paragraphs])}
+
+    elif file_type == 'pptx':
+        prs = Presentation(file_path)
+        for number, slide in enumerate(prs.slides, start=1):
             text = []
-            for slide in prs.slides:
-                for shape in slide.shapes:
-                    if hasattr(shape, "text"):
-                        text.append(shape.text)
-            return '\n'.join(text)
-        
-        elif file_type == 'pdf':
-            return extract_text(file_path)
-        
-        elif file_type == 'txt':
-            with open(file_path, 'r', encoding='utf-8') as file:
-                return file.read()
-        
-        else:
-            raise ValueError(f"Unsupported file type: {file_type}")
-    
+            for shape in slide.shapes:
+                if hasattr(shape, "text"):
+                    text.append(shape.text)
+            yield {"text": '\n'.join(text), "slide": number}
+
+    elif file_type == 'pdf':
+        for number, text in _iter_pdf_sections(file_path):
+            yield {"text": text, "page": number}
+
+    elif file_type == 'txt':
+        if not isinstance(file_path, str):
+            file_path.seek(0)
+            yield {"text": file_path.read().decode('utf-8')}
+            return
+        with open(file_path, 'r', encoding='utf-8') as file:
+            yield {"text": file.read()}
+
+    else:
+        raise ValueError(f"Unsupported file type: {file_type}")
+
+def iter_text_sections(
+    file_path: Union[str, BinaryIO],
+    file_type: str,
+    cleanup: bool = True,
+    use_cache: bool = True
+) -> Iterator[Dict[str, Any]]:
+    """
+    Like iter_sections, skipping sections without text. Files extracted
+    before, by content, are served from the extraction cache. A file on disk
+    is removed once the iterator is exhausted or closed, unless cleanup is False.
+    """
+    try:
+        cache = get_extraction_cache() if use_cache else None
+        key = ExtractionCache.make_key(hash_file(file_path), file_type) if cache else None
+        cached = cache.get(key) if cache else None
+        if cached is not None:
+            yield from cached
+            return
+
+        sections = []
+        for section in iter_sections(file_path, file_type):
+            if section["text"].strip():
+                sections.append(section)
+                yield section
+        # Only complete extractions are cached
+        if cache:
+            cache.put(key, sections)
+    finally:
+        if cleanup and isinstance(file_path, str) and os.path.exists(file_path):
+            os.remove(file_path)
+
+def extract_sections_from_file(
+    file_path: Union[str, BinaryIO],
+    file_type: str,
+    cleanup: bool = True,
+    use_cache: bool = True
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    Extract text content from different types of files, split into pages,
+    slides or whole-document sections for chunking. file_path may also be
+    an in-memory buffer such as io.BytesIO. A file on disk is removed
+    afterwards unless cleanup is False.
+    """
+    try:
+        sections = list(iter_text_sections(file_path, file_type, cleanup, use_cache))
+        return sections or None
+
     except Exception as e:
         print(f"Error extracting text from file: {str(e)}")
         return None
-    finally:
-        # Clean up the temporary file
-        if os.path.exists(file_path):
-            os.remove(file_path) 
\ No newline at end of file
+
+def extract_sections_from_bytes(data: bytes, file_type: str) -> Optional[List[Dict[str, Any]]]:
+    """
+    Extract sections from file contents held in memory, e.g. an archive
+    entry. Picklable, so it can run in the extraction pool; the calling
+    process consults the extraction cache.
+    """
+    return extract_sections_from_file(io.BytesIO(data), file_type, use_cache=False)
+
+async def extract_sections_from_bytes_async(data: bytes, file_type: str) -> Optional[List[Dict[str, Any]]]:
+    """
+    Extract sections from file contents in the extraction pool when
+    EXTRACTION_WORKERS is set, else in a worker thread
+    """
+    cache = get_extraction_cache()
+    key = ExtractionCache.make_key(hashlib.sha256(data).hexdigest(), file_type) if cache else None
+    if cache:
+        cached = await asyncio.to_thread(cache.get, key)
+        if cached is not None:
+            return cached or None
+
+    pool = get_extraction_pool()
+    if pool is None:
+        sections = await asyncio.to_thread(extract_sections_from_bytes, data, file_type)
+    else:
+        sections = await asyncio.wrap_future(pool.submit(extract_sections_from_bytes, data, file_type))
+    if cache and sections is not None:
+        await asyncio.to_thread(cache.put, key, sections)
+    return sections
+
+def extract_text_from_file(file_path: str, file_type: str) -> Optional[str]:
+    """
+    Extract text content from different types of files
+    """
+    sections = extract_sections_from_file(file_path, file_type)
+    if sections is None:
+        return None
+    return '\n'.join(section["text"] for section in sections)
@@ -1,180 +1,793 @@
 from elasticsearch import Elasticsearch
-from typing import Optional, Dict, Any, List
+from elasticsearch.helpers import streaming_bulk, async_streaming_bulk, scan, async_scan
+from typing import Optional, Dict, Any, List, Iterable, Tuple, Iterator, AsyncIterable, AsyncIterator, Union, Callable, Awaitable
+import asyncio
 import os
+import threading
+import uuid
 from datetime import datetime
-import numpy as np
-import torch
-from sentence_transformers import SentenceTransformer
 from app.core.config import settings
+from app.core.elastic import elasticsearch_client
+from app.services.embedding import embed_texts, aembed_texts
+from app.services.vector_store import VectorStore, get_vector_store
+from app.services.retrieval_cache import RetrievalCache
 
-# Initialize NumPy and PyTorch in the correct order
-try:
-    # First ensure NumPy is properly initialized
-    np.array([1, 2, 3])
-    
-    # Then initialize PyTorch
-    if not torch.cuda.is_available():
-        torch.set_default_device('cpu')
-    
-    # Initialize the sentence transformer model
-    model = SentenceTransformer('all-MiniLM-L6-v2', device='cpu')  # Force CPU usage
-    
-except Exception as e:
-    print(f"Error during initialization: {str(e)}")
-    raise
-
-# Initialize Elasticsearch client with proper connection settings
-try:
-    es = Elasticsearch(
-        settings.ELASTICSEARCH_URL,
-        basic_auth=(settings.ELASTICSEARCH_USER, settings.ELASTICSEARCH_PASSWORD),
-        verify_certs=False,  # Set to True in production
-        request_timeout=30
-    )
-    
-    # Test the connection
-    if not es.ping():
-        raise ConnectionError("Could not connect to Elasticsearch. Please make sure Elasticsearch is running.")
-        
-except Exception as e:
-    print(f"Error initializing Elasticsearch client: {str(e)}")
-    raise
+# (content, metadata) or (content, metadata, fields); fields are stored next to
+# the content, e.g. {"id": ..., "source": ..., "content_hash": ...}
+DocumentItem = Tuple[Any, ...]
 
-def create_bot_index(index_id: str) -> bool:
+_es: Optional[Elasticsearch] = None
+_es_lock = threading.Lock()
+
+def get_es() -> Elasticsearch:
     """
-    Create a new Elasticsearch index for a bot
+    Get the Elasticsearch client, creating it on first use
     """
-    try:
-        # Create index with basic settings
-        es.indices.create(
-            index=index_id,
-            body={
-                "settings": {
-                    "number_of_shards": 1,
-                    "number_of_replicas": 1
-                },
-                "mappings": {
-                    "properties": {
-                        "content": {"type": "text"},
-                        "metadata": {"type": "object"},
-                        "created_at": {"type": "date"},
-                        "embedding": {
-                            "type": "dense_vector",
-                            "dims": 384,  # all-MiniLM-L6-v2 dimension
-                            "index": True,
-                            "similarity": "cosine"
-                        }
-                    }
-                }
-            }
-        )
-        return True
-    except Exception as e:
-        print(f"Error creating index {index_id}: {str(e)}")
-        return False
+    global _es
+    if _es is None:
+        with _es_lock:
+            if _es is None:
+                _es = Elasticsearch(
+                    settings.ELASTICSEARCH_URL,
+                    basic_auth=(settings.ELASTICSEARCH_USER, settings.ELASTICSEARCH_PASSWORD),
+                    verify_certs=False,  # Set to True in production
+                    request_timeout=settings.ELASTICSEARCH_REQUEST_TIMEOUT
+                )
+    return _es
 
-def delete_bot_index(index_id: str) -> bool:
+async def check_connection_async() -> bool:
     """
-    Delete an Elasticsearch index for a bot
+    Check that Elasticsearch is reachable through the shared async client
     """
     try:
-        es.indices.delete(index=index_id)
-        return True
+        es = await elasticsearch_client.get_client()
+        if await es.ping():
+            return True
+        print("Could not connect to Elasticsearch. Please make sure Elasticsearch is running.")
     except Exception as e:
-        print(f"Error deleting index {index_id}: {str(e)}")
-        return False
+        print(f"Error connecting to Elasticsearch: {str(e)}")
+    return False
 
-def index_exists(index_id: str) -> bool:
+def check_connection() -> bool:
     """
-    Check if an index exists
+    Check that Elasticsearch is reachable
     """
-    return es.indices.exists(index=index_id)
+    try:
+        if get_es().ping():
+            return True
+        print("Could not connect to Elasticsearch. Please make sure Elasticsearch is running.")
+    except Exception as e:
+        print(f"Error connecting to Elasticsearch: {str(e)}")
+    return False
 
 def get_embedding(text: str) -> List[float]:
     """
     Get embedding for text using sentence-transformers
     """
     try:
-        # Generate embedding using the sentence transformer model
-        embedding = model.encode(text, convert_to_tensor=False).tolist()
-        return embedding
+        # Served from the embedding cache, or batched with concurrent callers on a miss
+        return embed_texts([text])[0]
+    except Exception as e:
+        print(f"Error getting embedding: {str(e)}")
+        raise
+
+def get_embeddings(texts: List[str]) -> List[List[float]]:
+    """
+    Get embeddings for several texts, encoded in as few batches as possible
+    """
+    try:
+        return embed_texts(texts)
+    except Exception as e:
+        print(f"Error getting embeddings: {str(e)}")
+        raise
+
+async def aget_embedding(text: str) -> List[float]:
+    """
+    Get embedding for text without blocking the event loop
+    """
+    try:
+        return (await aembed_texts([text]))[0]
     except Exception as e:
         print(f"Error getting embedding: {str(e)}")
         raise
 
+def _build_document(
+    content: str,
+    metadata: Optional[Dict[str, Any]],
+    embedding: List[float],
+    fields: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Build the Elasticsearch source for a document. fields may set the
+    document "id" and its "source" and "content_hash".
+    """
+    return {
+        "content": content,
+        "metadata": metadata or {},
+        "created_at": datetime.utcnow(),
+        "embedding": embedding,
+        **(fields or {})
+    }
+
+def _build_search_body(
+    query_embedding: List[float],
+    size: int,
+    mode: Optional[str] = None,
+    k: Optional[int] = None,
+    num_candidates: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Build the semantic search request body.
+
+    "knn" uses the HNSW graph of the indexed embedding field (approximate, scores
+    are (1 + cosine) / 2); "exact" scores every document with a cosineSimilarity
+    script (scores are 1 + cosine).
+    """
+    mode = mode or settings.SEARCH_MODE
+    if mode == "knn":
+        k = k or size
+        return {
+            "size": size,
+            "knn": {
+                "field": "embedding",
+                "query_vector": query_embedding,
+                "k": k,
+                "num_candidates": max(num_candidates or settings.KNN_NUM_CANDIDATES, k)
+            },
+            "_source": ["content", "metadata", "created_at"]
+        }
+    if mode != "exact":
+        raise ValueError(f"Unsupported search mode: {mode}")
+
+    return {
+        "size": size,
+        "query": {
+            "function_score": {
+                "query": {"match_all": {}},
+                "functions": [
+                    {
+                        "script_score": {
+                            "script": {
+                                "source": "cosineSimilarity(params.query_vector, 'embedding') + 1.0",
+                                "params": {"query_vector": query_embedding}
+                            }
+                        }
+                    }
+                ],
+                "boost_mode": "replace"
+            }
+        },
+        "_source": ["content", "metadata", "created_at"]
+    }
+
+def _build_lexical_body(query: str, size: int) -> Dict[str, Any]:
+    """
+    Build a BM25 match query on the document content
+    """
+    return {
+        "size": size,
+        "query": {"match": {"content": {"query": query}}},
+        "_source": ["content", "metadata", "created_at"]
+    }
+
+def _build_hybrid_searches(
+    index_id: str,
+    query: str,
+    query_embedding: List[float],
+    size: int,
+    k: Optional[int] = None,
+    num_candidates: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """
+    Build the _msearch payload running the lexical and kNN queries in one round trip
+    """
+    window = max(size, settings.HYBRID_RANK_WINDOW)
+    return [
+        {"index": index_id},
+        _build_lexical_body(query, window),
+        {"index": index_id},
+        _build_search_body(query_embedding, window, "knn", max(k or window, window), num_candidates),
+    ]
+
+def _fuse_hybrid_response(
+    response: Dict[str, Any],
+    size: int,
+    lexical_weight: Optional[float] = None,
+    vector_weight: Optional[float] = None
+) -> List[Dict[str, Any]]:
+    """
+    Combine the lexical and kNN rankings with weighted reciprocal rank fusion:
+    score = sum(weight / (rank_constant + rank)) over the rankings a hit appears in
+    """
+    weights = [
+        settings.HYBRID_LEXICAL_WEIGHT if lexical_weight is None else lexical_weight,
+        settings.HYBRID_VECTOR_WEIGHT if vector_weight is None else vector_weight,
+    ]
+    fused: Dict[str, Dict[str, Any]] = {}
+    for ranking, weight in zip(response["responses"], weights):
+        if "error" in ranking:
+            raise RuntimeError(f"Hybrid search failed: {ranking['error']}")
+        for rank, result in enumerate(_format_hits(ranking), start=1):
+            entry = fused.setdefault(result["id"], dict(result, score=0.0))
+            entry["score"] += weight / (settings.RRF_RANK_CONSTANT + rank)
+    return sorted(fused.values(), key=lambda result: result["score"], reverse=True)[:size]
+
+def _format_hits(response: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Extract and format search hits
+    """
+    results = []
+    for hit in response["hits"]["hits"]:
+        result = {
+            "id": hit["_id"],
+            "content": hit["_source"]["content"],
+            "metadata": hit["_source"].get("metadata", {}),
+            "created_at": hit["_source"].get("created_at"),
+            "score": hit["_score"]
+        }
+        results.append(result)
+    return results
+
+# Cache of search results, invalidated per bot on every write
+retrieval_cache = RetrievalCache(
+    max_entries=settings.RETRIEVAL_CACHE_SIZE,
+    ttl_seconds=settings.RETRIEVAL_CACHE_TTL_SECONDS,
+    settle_seconds=settings.RETRIEVAL_CACHE_SETTLE_SECONDS
+)
+
+def _build_index_body() -> Dict[str, Any]:
+    """
+    Build the settings and mappings of a bot index
+    """
+    return {
+        "settings": {
+            "number_of_shards": 1,
+            "number_of_replicas": 1
+        },
+        "mappings": {
+            "properties": {
+                "content": {"type": "text"},
+                "metadata": {"type": "object"},
+                "created_at": {"type": "date"},
+                "source": {"type": "keyword"},
+                "content_hash": {"type": "keyword"},
+                "embedding": {
+                    "type": "dense_vector",
+                    "dims": 384,  # all-MiniLM-L6-v2 dimension
+                    "index": True,
+                    "similarity": "cosine"
+                }
+            }
+        }
+    }
+
+def _build_bulk_actions(index_id: str, documents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Turn documents into _bulk index actions. Every action gets an _id, so
+    results can be matched back to their document
+    """
+    return [
+        {
+            "_op_type": "index",
+            "_index": index_id,
+            "_id": document.get("id") or uuid.uuid4().hex,
+            "_source": _without_id(document)
+        }
+        for document in documents
+    ]
+
+def _without_id(document: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value for key, value in document.items() if key != "id"}
+
+def _build_source_query(source: str) -> Dict[str, Any]:
+    """
+    Query for the content hashes of every chunk of a source
+    """
+    return {"query": {"term": {"source": source}}, "_source": ["content_hash"]}
+
+# Fields added to the mapping of indexes created before documents had sources
+SOURCE_FIELD_MAPPINGS = {"source": {"type": "keyword"}, "content_hash": {"type": "keyword"}}
+
+def _bulk_item_result(ok: bool, item: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert a streaming_bulk item into a per-document result
+    """
+    info = item.get("index", {})
+    if ok:
+        return {"id": info.get("_id"), "status": "success"}
+    error = info.get("error") or info.get("exception") or item
+    return {"id": info.get("_id"), "status": "failed", "error": str(error)}
+
+def _ordered_bulk_results(actions: List[Dict[str, Any]], results: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Put {_id: result} back in the order of actions. streaming_bulk yields
+    retried items after the rest of their chunk, so yield order cannot be used
+    """
+    return [
+        results.get(action["_id"]) or {"id": action["_id"], "status": "failed", "error": "No result from bulk request"}
+        for action in actions
+    ]
+
+class ElasticsearchVectorStore(VectorStore):
+    """
+    Vector store keeping one Elasticsearch index per bot. Sync methods use the
+    blocking client, async methods the shared pooled AsyncElasticsearch.
+    """
+
+    def __init__(self):
+        self._mapped_indexes = set()
+
+    def create_index(self, index_id: str) -> bool:
+        try:
+            get_es().indices.create(index=index_id, body=_build_index_body())
+            return True
+        except Exception as e:
+            print(f"Error creating index {index_id}: {str(e)}")
+            return False
+
+    def delete_index(self, index_id: str) -> bool:
+        try:
+            get_es().indices.delete(index=index_id)
+            return True
+        except Exception as e:
+            print(f"Error deleting index {index_id}: {str(e)}")
+            return False
+
+    def index_exists(self, index_id: str) -> bool:
+        return get_es().indices.exists(index=index_id)
+
+    def add(self, index_id: str, document: Dict[str, Any]) -> str:
+        response = get_es().index(index=index_id, id=document.get("id"), document=_without_id(document))
+        return response["_id"]
+
+    def bulk_add(self, index_id: str, documents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # Rejected (429) items are retried with backoff; other failures are reported per item
+        actions = _build_bulk_actions(index_id, documents)
+        results = {}
+        for ok, item in streaming_bulk(
+            get_es(),
+            actions,
+            chunk_size=max(1, len(documents)),
+            max_retries=settings.BULK_MAX_RETRIES,
+            raise_on_error=False,
+            raise_on_exception=False
+        ):
+            result = _bulk_item_result(ok, item)
+            results[result["id"]] = result
+        return _ordered_bulk_results(actions, results)
+
+    def search(
+        self,
+        index_id: str,
+        query: str,
+        query_embedding: List[float],
+        size: int = 10,
+        mode: Optional[str] = None,
+        k: Optional[int] = None,
+        num_candidates: Optional[int] = None,
+        lexical_weight: Optional[float] = None,
+        vector_weight: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        mode = mode or settings.SEARCH_MODE
+        if mode == "hybrid":
+            response = get_es().msearch(
+                searches=_build_hybrid_searches(index_id, query, query_embedding, size, k, num_candidates)
+            )
+            return _fuse_hybrid_response(response, size, lexical_weight, vector_weight)
+
+        # Perform semantic search with proper query structure
+        response = get_es().search(
+            index=index_id,
+            body=_build_search_body(query_embedding, size, mode, k, num_candidates)
+        )
+        return _format_hits(response)
+
+    def delete(self, index_id: str, ids: List[str]) -> int:
+        if not ids:
+            return 0
+        response = get_es().delete_by_query(index=index_id, query={"ids": {"values": ids}}, refresh=True)
+        return response.get("deleted", 0)
+
+    def get_source_hashes(self, index_id: str, source: str) -> Dict[str, str]:
+        self._ensure_source_mapping(index_id)
+        return {
+            hit["_id"]: hit["_source"].get("content_hash")
+            for hit in scan(get_es(), index=index_id, query=_build_source_query(source))
+        }
+
+    def _ensure_source_mapping(self, index_id: str):
+        # Indexes created before sources existed would otherwise map them as analyzed text
+        if index_id in self._mapped_indexes:
+            return
+        try:
+            get_es().indices.put_mapping(index=index_id, properties=SOURCE_FIELD_MAPPINGS)
+        except Exception as e:
+            print(f"Error updating mapping of index {index_id}: {str(e)}")
+        self._mapped_indexes.add(index_id)
+
+    async def create_index_async(self, index_id: str) -> bool:
+        try:
+            es = await elasticsearch_client.get_client()
+            await es.indices.create(index=index_id, body=_build_index_body())
+            return True
+        except Exception as e:
+            print(f"Error creating index {index_id}: {str(e)}")
+            return False
+
+    async def delete_index_async(self, index_id: str) -> bool:
+        try:
+            es = await elasticsearch_client.get_client()
+            await es.indices.delete(index=index_id)
+            return True
+        except Exception as e:
+            print(f"Error deleting index {index_id}: {str(e)}")
+            return False
+
+    async def add_async(self, index_id: str, document: Dict[str, Any]) -> str:
+        es = await elasticsearch_client.get_client()
+        response = await es.index(index=index_id, id=document.get("id"), document=_without_id(document))
+        return response["_id"]
+
+    async def bulk_add_async(self, index_id: str, documents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        es = await elasticsearch_client.get_client()
+        actions = _build_bulk_actions(index_id, documents)
+        results = {}
+        async for ok, item in async_streaming_bulk(
+            es,
+            actions,
+            chunk_size=max(1, len(documents)),
+            max_retries=settings.BULK_MAX_RETRIES,
+            raise_on_error=False,
+            raise_on_exception=False
+        ):
+            result = _bulk_item_result(ok, item)
+            results[result["id"]] = result
+        return _ordered_bulk_results(actions, results)
+
+    async def search_async(
+        self,
+        index_id: str,
+        query: str,
+        query_embedding: List[float],
+        size: int = 10,
+        mode: Optional[str] = None,
+        k: Optional[int] = None,
+        num_candidates: Optional[int] = None,
+        lexical_weight: Optional[float] = None,
+        vector_weight: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        es = await elasticsearch_client.get_client()
+        mode = mode or settings.SEARCH_MODE
+        if mode == "hybrid":
+            response = await es.msearch(
+                searches=_build_hybrid_searches(index_id, query, query_embedding, size, k, num_candidates)
+            )
+            return _fuse_hybrid_response(response, size, lexical_weight, vector_weight)
+
+        response = await es.search(
+            index=index_id,
+            body=_build_search_body(query_embedding, size, mode, k, num_candidates)
+        )
+        return _format_hits(response)
+
+    async def delete_async(self, index_id: str, ids: List[str]) -> int:
+        if not ids:
+            return 0
+        es = await elasticsearch_client.get_client()
+        response = await es.delete_by_query(index=index_id, query={"ids": {"values": ids}}, refresh=True)
+        return response.get("deleted", 0)
+
+    async def get_source_hashes_async(self, index_id: str, source: str) -> Dict[str, str]:
+        es = await elasticsearch_client.get_client()
+        if index_id not in self._mapped_indexes:
+            try:
+                await es.indices.put_mapping(index=index_id, properties=SOURCE_FIELD_MAPPINGS)
+            except Exception as e:
+                print(f"Error updating mapping of index {index_id}: {str(e)}")
+            self._mapped_indexes.add(index_id)
+        return {
+            hit["_id"]: hit["_source"].get("content_hash")
+            async for hit in async_scan(es, index=index_id, query=_build_source_query(source))
+        }
+
+def create_bot_index(index_id: str) -> bool:
+    """
+    Create a new index for a bot
+    """
+    retrieval_cache.invalidate(index_id)
+    return get_vector_store().create_index(index_id)
+
+def delete_bot_index(index_id: str) -> bool:
+    """
+    Delete the index of a bot
+    """
+    deleted = get_vector_store().delete_index(index_id)
+    retrieval_cache.invalidate(index_id)
+    return deleted
+
+async def create_bot_index_async(index_id: str) -> bool:
+    """
+    Create a new index for a bot without blocking the event loop
+    """
+    retrieval_cache.invalidate(index_id)
+    return await get_vector_store().create_index_async(index_id)
+
+async def delete_bot_index_async(index_id: str) -> bool:
+    """
+    Delete the index of a bot without blocking the event loop
+    """
+    deleted = await get_vector_store().delete_index_async(index_id)
+    retrieval_cache.invalidate(index_id)
+    return deleted
+
+def index_exists(index_id: str) -> bool:
+    """
+    Check if an index exists
+    """
+    return get_vector_store().index_exists(index_id)
+
 def add_document(index_id: str, content: str, metadata: Optional[Dict[str, Any]] = None) -> str:
     """
-    Add a document to Elasticsearch with embedding
+    Add a document to the bot's index with embedding
     """
     try:
         # Get embedding for the content
         embedding = get_embedding(content)
         
-        # Prepare document
-        document = {
-            "content": content,
-            "metadata": metadata or {},
-            "created_at": datetime.utcnow(),
-            "embedding": embedding
-        }
-        
         # Index the document
-        response = es.index(
-            index=index_id,
-            document=document
-        )
-        
-        return response["_id"]
+        doc_id = get_vector_store().add(index_id, _build_document(content, metadata, embedding))
+        retrieval_cache.invalidate(index_id)
+        return doc_id
+    except Exception as e:
+        print(f"Error adding document to index {index_id}: {str(e)}")
+        raise
+
+async def add_document_async(index_id: str, content: str, metadata: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Add a document with embedding, awaiting the embedding workers instead of blocking
+    """
+    try:
+        embedding = await aget_embedding(content)
+        doc_id = await get_vector_store().add_async(index_id, _build_document(content, metadata, embedding))
+        retrieval_cache.invalidate(index_id)
+        return doc_id
     except Exception as e:
         print(f"Error adding document to index {index_id}: {str(e)}")
         raise
 
-def search_documents(index_id: str, query: str, size: int = 10) -> List[Dict[str, Any]]:
+def get_source_hashes(index_id: str, source: str) -> Dict[str, str]:
+    """
+    Get {chunk id: content hash} of everything stored from a source (URL or filename)
+    """
+    return get_vector_store().get_source_hashes(index_id, source)
+
+async def get_source_hashes_async(index_id: str, source: str) -> Dict[str, str]:
+    return await get_vector_store().get_source_hashes_async(index_id, source)
+
+def delete_documents(index_id: str, ids: List[str]) -> int:
     """
-    Search documents using semantic search
+    Delete documents from the bot's index by id
     """
+    if not ids:
+        return 0
     try:
+        return get_vector_store().delete(index_id, ids)
+    finally:
+        retrieval_cache.invalidate(index_id)
+
+async def delete_documents_async(index_id: str, ids: List[str]) -> int:
+    if not ids:
+        return 0
+    try:
+        return await get_vector_store().delete_async(index_id, ids)
+    finally:
+        retrieval_cache.invalidate(index_id)
+
+def _batched(items: Iterable[DocumentItem], size: int) -> Iterator[List[DocumentItem]]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+async def _abatched(
+    items: Union[Iterable[DocumentItem], AsyncIterable[DocumentItem]],
+    size: int
+) -> AsyncIterator[List[DocumentItem]]:
+    if not hasattr(items, "__aiter__"):
+        for batch in _batched(items, size):
+            yield batch
+        return
+    batch = []
+    async for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def _embed_batch(batch: List[DocumentItem], embeddings: Optional[List[List[float]]]) -> Tuple[List[Dict[str, Any]], List[Optional[Dict[str, Any]]]]:
+    """
+    Pair a batch with its embeddings. When the batch failed to embed as a whole,
+    retry item by item so one bad input only fails itself. Returns the
+    documents to store and, per item, either None or its failure result.
+    """
+    if embeddings is None:
+        embeddings = []
+        for content, *_ in batch:
+            try:
+                embeddings.append(get_embedding(content))
+            except Exception:
+                embeddings.append(None)
+    documents, failures = [], []
+    for item, embedding in zip(batch, embeddings):
+        content, metadata = item[0], item[1]
+        fields = item[2] if len(item) > 2 else None
+        if embedding is None:
+            failures.append({"id": (fields or {}).get("id"), "status": "failed", "error": "Could not embed content"})
+        else:
+            documents.append(_build_document(content, metadata, embedding, fields))
+            failures.append(None)
+    return documents, failures
+
+def _merge_batch_results(failures: List[Optional[Dict[str, Any]]], stored: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    stored_iter = iter(stored)
+    return [failure or next(stored_iter) for failure in failures]
+
+def bulk_add_documents(
+    index_id: str,
+    items: Iterable[DocumentItem],
+    chunk_size: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """
+    Add many (content, metadata) pairs, or (content, metadata, fields) to set
+    the id, source and content_hash. Items are embedded and indexed chunk_size
+    at a time (one batched embedding call and one _bulk request per chunk), so
+    the iterable is consumed lazily. Returns one result per item, in order.
+    """
+    chunk_size = chunk_size or settings.BULK_CHUNK_SIZE
+    store = get_vector_store()
+    results = []
+    try:
+        for batch in _batched(items, chunk_size):
+            try:
+                embeddings = get_embeddings([item[0] for item in batch])
+            except Exception:
+                embeddings = None
+            documents, failures = _embed_batch(batch, embeddings)
+            results.extend(_merge_batch_results(failures, store.bulk_add(index_id, documents) if documents else []))
+    finally:
+        retrieval_cache.invalidate(index_id)
+    return results
+
+async def bulk_add_documents_async(
+    index_id: str,
+    items: Union[Iterable[DocumentItem], AsyncIterable[DocumentItem]],
+    chunk_size: Optional[int] = None,
+    on_batch: Optional[Callable[[List[Dict[str, Any]]], Awaitable[None]]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Async variant of bulk_add_documents. The next chunk is embedded while the
+    previous one is being indexed. items may be an async iterable, e.g. chunks
+    produced in a worker thread while the document is still being extracted.
+    on_batch is awaited with the results of every chunk as it is stored,
+    between pulls from items.
+    """
+    chunk_size = chunk_size or settings.BULK_CHUNK_SIZE
+    store = get_vector_store()
+    results = []
+
+    async def embed(batch):
+        try:
+            embeddings = await aembed_texts([item[0] for item in batch])
+        except Exception:
+            embeddings = None
+        return await asyncio.to_thread(_embed_batch, batch, embeddings)
+
+    async def stored(batch_results):
+        results.extend(batch_results)
+        if on_batch:
+            await on_batch(batch_results)
+
+    pending = None
+    try:
+        async for batch in _abatched(items, chunk_size):
+            embedding = asyncio.ensure_future(embed(batch))
+            if pending:
+                await stored(await pending)
+            documents, failures = await embedding
+            pending = asyncio.ensure_future(_store_batch(store, index_id, documents, failures))
+        if pending:
+            await stored(await pending)
+    finally:
+        # If producing items failed, let the batch in flight finish before reporting the error
+        if pending and not pending.done():
+            await asyncio.gather(pending, return_exceptions=True)
+        retrieval_cache.invalidate(index_id)
+    return results
+
+async def _store_batch(store: VectorStore, index_id: str, documents: List[Dict[str, Any]], failures: List[Optional[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    stored = await store.bulk_add_async(index_id, documents) if documents else []
+    return _merge_batch_results(failures, stored)
+
+def _search_options(
+    mode: Optional[str],
+    k: Optional[int],
+    num_candidates: Optional[int],
+    lexical_weight: Optional[float],
+    vector_weight: Optional[float]
+) -> Dict[str, Any]:
+    """
+    Collect the search options, resolving the default mode so it is part of the cache key
+    """
+    return {
+        "mode": mode or settings.SEARCH_MODE,
+        "k": k,
+        "num_candidates": num_candidates,
+        "lexical_weight": lexical_weight,
+        "vector_weight": vector_weight
+    }
+
+def search_documents(
+    index_id: str,
+    query: str,
+    size: int = 10,
+    mode: Optional[str] = None,
+    k: Optional[int] = None,
+    num_candidates: Optional[int] = None,
+    lexical_weight: Optional[float] = None,
+    vector_weight: Optional[float] = None
+) -> List[Dict[str, Any]]:
+    """
+    Search documents. mode is "knn", "exact" or "hybrid" and defaults to
+    SEARCH_MODE; k and num_candidates tune the kNN search and the weights
+    balance BM25 against vectors in hybrid mode.
+    """
+    try:
+        options = _search_options(mode, k, num_candidates, lexical_weight, vector_weight)
+        generation = retrieval_cache.generation(index_id)
+        cached = retrieval_cache.get(index_id, query, size, options)
+        if cached is not None:
+            return cached
+
         # Get embedding for the query
         query_embedding = get_embedding(query)
         
-        # Perform semantic search with proper query structure
-        response = es.search(
-            index=index_id,
-            body={
-                "size": size,
-                "query": {
-                    "function_score": {
-                        "query": {"match_all": {}},
-                        "functions": [
-                            {
-                                "script_score": {
-                                    "script": {
-                                        "source": "cosineSimilarity(params.query_vector, 'embedding') + 1.0",
-                                        "params": {"query_vector": query_embedding}
-                                    }
-                                }
-                            }
-                        ],
-                        "boost_mode": "replace"
-                    }
-                },
-                "_source": ["content", "metadata", "created_at"]
-            }
-        )
-        
-        # Extract and format the results
-        results = []
-        for hit in response["hits"]["hits"]:
-            result = {
-                "content": hit["_source"]["content"],
-                "metadata": hit["_source"].get("metadata", {}),
-                "created_at": hit["_source"].get("created_at"),
-                "score": hit["_score"]
-            }
-            results.append(result)
-        
+        results = get_vector_store().search(index_id, query, query_embedding, size=size, **options)
+        retrieval_cache.put(index_id, query, size, options, results, generation)
         return results
     except Exception as e:
         print(f"Error searching documents in index {index_id}: {str(e)}")
-        raise 
-    
\ No newline at end of file
+        raise
+
+async def search_documents_async(
+    index_id: str,
+    query: str,
+    size: int = 10,
+    mode: Optional[str] = None,
+    k: Optional[int] = None,
+    num_candidates: Optional[int] = None,
+    lexical_weight: Optional[float] = None,
+    vector_weight: Optional[float] = None
+) -> List[Dict[str, Any]]:
+    """
+    Search documents without blocking the event loop
+    """
+    try:
+        options = _search_options(mode, k, num_candidates, lexical_weight, vector_weight)
+        generation = retrieval_cache.generation(index_id)
+        cached = retrieval_cache.get(index_id, query, size, options)
+        if cached is not None:
+            return cached
+
+        query_embedding = await aget_embedding(query)
+        results = await get_vector_store().search_async(index_id, query, query_embedding, size=size, **options)
+        retrieval_cache.put(index_id, query, size, options, results, generation)
+        return results
+    except Exception as e:
+        print(f"Error searching documents in index {index_id}: {str(e)}")
+        raise
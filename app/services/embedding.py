@@ -0,0 +1,286 @@
+from concurrent.futures import CancelledError, Executor, Future, ProcessPoolExecutor
+from typing import Callable, List, Optional, Tuple
+import asyncio
+import multiprocessing
+import queue
+import os
+import threading
+import time
+from app.core.config import settings
+from app.services.embedding_cache import EmbeddingCache
+from app.services.embedding_backends import EmbeddingBackend, create_embedding_backend, get_backend_name
+
+_backend: Optional[EmbeddingBackend] = None
+_embedding_cache: Optional[EmbeddingCache] = None
+_tokenizer = None
+_init_lock = threading.Lock()
+
+def get_backend() -> EmbeddingBackend:
+    """
+    Get the embedding backend selected in settings, loading the model on first use
+    """
+    global _backend
+    if _backend is None:
+        with _init_lock:
+            if _backend is None:
+                try:
+                    _backend = create_embedding_backend(
+                        settings.EMBEDDING_BACKEND,
+                        settings.EMBEDDING_MODEL_NAME,
+                        onnx_model_dir=settings.EMBEDDING_ONNX_MODEL_DIR,
+                        onnx_threads=settings.EMBEDDING_ONNX_THREADS
+                    )
+                except Exception as e:
+                    print(f"Error initializing embedding backend: {str(e)}")
+                    raise
+    return _backend
+
+def get_tokenizer():
+    """
+    Get the tokenizer of the embedding model. Loads only the tokenizer when the
+    model itself lives in worker processes.
+    """
+    global _tokenizer
+    if _backend is not None:
+        return _backend.tokenizer
+    if _tokenizer is None:
+        with _init_lock:
+            if _tokenizer is None:
+                from transformers import AutoTokenizer
+                if settings.EMBEDDING_BACKEND == "onnx" and settings.EMBEDDING_ONNX_MODEL_DIR:
+                    source = settings.EMBEDDING_ONNX_MODEL_DIR
+                elif "/" in settings.EMBEDDING_MODEL_NAME:
+                    source = settings.EMBEDDING_MODEL_NAME
+                else:
+                    # sentence-transformers resolves bare model names to its own organization
+                    source = f"sentence-transformers/{settings.EMBEDDING_MODEL_NAME}"
+                _tokenizer = AutoTokenizer.from_pretrained(source)
+    return _tokenizer
+
+def get_embedding_cache() -> EmbeddingCache:
+    """
+    Get the embedding cache, keyed by the name of the active backend
+    """
+    global _embedding_cache
+    if _embedding_cache is None:
+        with _init_lock:
+            if _embedding_cache is None:
+                _embedding_cache = EmbeddingCache(
+                    get_backend_name(settings.EMBEDDING_BACKEND, settings.EMBEDDING_MODEL_NAME),
+                    max_entries=settings.EMBEDDING_CACHE_SIZE,
+                    db_path=settings.EMBEDDING_CACHE_PATH
+                )
+    return _embedding_cache
+
+def encode_batch(texts: List[str]) -> List[List[float]]:
+    """
+    Encode a batch of texts with the embedding backend in one forward pass
+    """
+    return get_backend().encode(texts).tolist()
+
+def _init_worker_process(threads_per_worker: int):
+    """Limit torch threads per worker process and load the model before the first batch arrives."""
+    if settings.EMBEDDING_BACKEND == "torch":
+        import torch
+        torch.set_num_threads(max(1, threads_per_worker))
+    get_backend()
+
+def create_process_pool(workers: int) -> Optional[ProcessPoolExecutor]:
+    """
+    Create the pool of embedding worker processes, or None to encode in-process
+    """
+    if workers <= 0:
+        return None
+    # Spawn rather than fork: forking a process that already initialized torch is unsafe
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker_process,
+        initargs=((os.cpu_count() or 1) // workers,)
+    )
+
+class EmbeddingBatcher:
+    """
+    Gathers concurrent embedding requests for a short window and encodes them
+    as a single batch. Every caller gets a Future resolving to its own vector.
+
+    When an executor factory is given, the executor is created on first use
+    and batches are encoded there instead of on the batching thread, with at
+    most max_in_flight batches outstanding; while the executor is busy new
+    requests keep accumulating into larger batches.
+    """
+
+    def __init__(
+        self,
+        encode_fn: Callable[[List[str]], List[List[float]]],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        executor_factory: Optional[Callable[[], Optional[Executor]]] = None,
+        max_in_flight: int = 1
+    ):
+        self.encode_fn = encode_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.executor_factory = executor_factory
+        self.executor: Optional[Executor] = None
+        self._in_flight = threading.BoundedSemaphore(max(1, max_in_flight))
+        self._queue: "queue.Queue[Tuple[str, Future]]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _ensure_worker(self):
+        """Start the background batching thread (and executor) on first use."""
+        if self._worker and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker and self._worker.is_alive():
+                return
+            if self.executor is None and self.executor_factory:
+                self.executor = self.executor_factory()
+            self._worker = threading.Thread(
+                target=self._run,
+                name="embedding-batcher",
+                daemon=True
+            )
+            self._worker.start()
+
+    def _collect_batch(self) -> List[Tuple[str, Future]]:
+        """Block for the first request, then gather more until the batch is full or the wait expires."""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    @staticmethod
+    def _resolve(batch: List[Tuple[str, Future]], embeddings: Optional[List[List[float]]], error: Optional[BaseException]):
+        """Hand every caller in the batch its own vector, or the batch error."""
+        if error is not None:
+            print(f"Error encoding embedding batch: {str(error)}")
+            for _, future in batch:
+                future.set_exception(error)
+            return
+        for (_, future), embedding in zip(batch, embeddings):
+            future.set_result(embedding)
+
+    def _run(self):
+        while True:
+            executor = self.executor
+            if executor:
+                # Wait for a free slot before collecting, so requests pile up into bigger batches
+                self._in_flight.acquire()
+            batch = self._collect_batch()
+            # Drop requests whose callers already gave up
+            batch = [(text, future) for text, future in batch if future.set_running_or_notify_cancel()]
+            if not batch:
+                if executor:
+                    self._in_flight.release()
+                continue
+            texts = [text for text, _ in batch]
+            if executor:
+                self._dispatch(executor, batch, texts)
+                continue
+            try:
+                embeddings = self.encode_fn(texts)
+            except Exception as e:
+                self._resolve(batch, None, e)
+            else:
+                self._resolve(batch, embeddings, None)
+
+    def _dispatch(self, executor: Executor, batch: List[Tuple[str, Future]], texts: List[str]):
+        """Send a batch to the executor and resolve callers when it completes."""
+        def on_done(pool_future: Future):
+            self._in_flight.release()
+            if pool_future.cancelled():
+                self._resolve(batch, None, CancelledError("Embedding executor was shut down"))
+                return
+            error = pool_future.exception()
+            self._resolve(batch, None if error else pool_future.result(), error)
+
+        try:
+            pool_future = executor.submit(self.encode_fn, texts)
+        except Exception as e:
+            self._in_flight.release()
+            self._resolve(batch, None, e)
+            return
+        pool_future.add_done_callback(on_done)
+
+    def submit(self, text: str) -> Future:
+        """Queue a text for embedding and return a Future for its vector."""
+        self._ensure_worker()
+        future: Future = Future()
+        self._queue.put((text, future))
+        return future
+
+    def shutdown(self):
+        """Stop the executor, failing any batches still queued in it."""
+        if self.executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    def encode(self, text: str) -> List[float]:
+        """Embed a single text, waiting for the batch it lands in."""
+        return self.submit(text).result()
+
+    def encode_many(self, texts: List[str]) -> List[List[float]]:
+        """Embed several texts; they are batched together with any concurrent requests."""
+        futures = [self.submit(text) for text in texts]
+        return [future.result() for future in futures]
+
+# Create a singleton instance; worker processes only import this module and never start the pool
+embedding_batcher = EmbeddingBatcher(
+    encode_batch,
+    max_batch_size=settings.EMBEDDING_BATCH_SIZE,
+    max_wait_ms=settings.EMBEDDING_BATCH_WAIT_MS,
+    executor_factory=lambda: create_process_pool(settings.EMBEDDING_WORKERS),
+    max_in_flight=settings.EMBEDDING_WORKERS
+)
+
+def embed_texts(texts: List[str]) -> List[List[float]]:
+    """
+    Embed texts through the cache, sending only the misses to the batcher
+    """
+    embedding_cache = get_embedding_cache()
+    cached = embedding_cache.get_many(texts)
+    # Encode each distinct missing text once
+    missing = list(dict.fromkeys(text for i, text in enumerate(texts) if i not in cached))
+    if missing:
+        vectors = embedding_batcher.encode_many(missing)
+        embedding_cache.put_many(missing, vectors)
+        computed = dict(zip(missing, vectors))
+        for i, text in enumerate(texts):
+            if i not in cached:
+                cached[i] = computed[text]
+    return [cached[i] for i in range(len(texts))]
+
+async def aembed_texts(texts: List[str]) -> List[List[float]]:
+    """
+    Async variant of embed_texts: waits for the batcher without blocking the event loop
+    """
+    embedding_cache = get_embedding_cache()
+    cached = await asyncio.to_thread(embedding_cache.get_many, texts)
+    missing = list(dict.fromkeys(text for i, text in enumerate(texts) if i not in cached))
+    if missing:
+        vectors = list(await asyncio.gather(
+            *[asyncio.wrap_future(embedding_batcher.submit(text)) for text in missing]
+        ))
+        await asyncio.to_thread(embedding_cache.put_many, missing, vectors)
+        computed = dict(zip(missing, vectors))
+        for i, text in enumerate(texts):
+            if i not in cached:
+                cached[i] = computed[text]
+    return [cached[i] for i in range(len(texts))]
+
+def warm_up_embeddings():
+    """
+    Load the model, start the batcher and its worker processes, and run one
+    encode so the first real request does not pay for initialization
+    """
+    get_embedding_cache()
+    embedding_batcher.encode("warm up")
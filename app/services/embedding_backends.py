@@ -0,0 +1,157 @@
+from abc import ABC, abstractmethod
+from typing import List, Optional
+import os
+import numpy as np
+
+class EmbeddingBackend(ABC):
+    """
+    Interface for the models that turn text into embedding vectors
+    """
+
+    # Identifies the backend in cache keys, so vectors from different backends never mix
+    name: str = ""
+    dimension: int = 384
+    max_seq_length: int = 256
+
+    @abstractmethod
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Encode texts into a (len(texts), dimension) float32 array of unit vectors."""
+
+    @property
+    @abstractmethod
+    def tokenizer(self):
+        """The Hugging Face tokenizer that feeds the model."""
+
+class SentenceTransformerBackend(EmbeddingBackend):
+    """
+    Full-precision PyTorch inference through sentence-transformers
+    """
+
+    def __init__(self, model_name: str):
+        import torch
+        from sentence_transformers import SentenceTransformer
+
+        # Initialize NumPy and PyTorch in the correct order
+        np.array([1, 2, 3])
+        if not torch.cuda.is_available():
+            torch.set_default_device('cpu')
+
+        self.model = SentenceTransformer(model_name, device='cpu')  # Force CPU usage
+        self.name = get_backend_name("torch", model_name)
+        self.dimension = self.model.get_sentence_embedding_dimension()
+        self.max_seq_length = self.model.max_seq_length
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        return self.model.encode(
+            texts,
+            batch_size=len(texts),
+            convert_to_numpy=True,
+            show_progress_bar=False
+        ).astype(np.float32)
+
+    @property
+    def tokenizer(self):
+        return self.model.tokenizer
+
+class OnnxEmbeddingBackend(EmbeddingBackend):
+    """
+    Int8-quantized ONNX Runtime export of the sentence-transformers model.
+    Reproduces its mean pooling and normalization on top of the raw encoder
+    output. Build the model directory with scripts/export_onnx_model.py.
+    """
+
+    def __init__(self, model_name: str, model_dir: str, num_threads: int = 0, max_seq_length: int = 256):
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise ImportError("The onnx embedding backend requires the onnxruntime package") from e
+        from transformers import AutoTokenizer
+
+        model_path = os.path.join(model_dir, "model_quantized.onnx")
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"ONNX embedding model not found at {model_path}")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads > 0:
+            options.intra_op_num_threads = num_threads
+
+        self.session = ort.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+        self._tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self._input_names = {model_input.name for model_input in self.session.get_inputs()}
+        self.name = get_backend_name("onnx", model_name)
+        self.dimension = self.session.get_outputs()[0].shape[-1]
+        self.max_seq_length = max_seq_length
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        inputs = self._tokenizer(
+            texts,
+            padding=True,
+            truncation=True,
+            max_length=self.max_seq_length,
+            return_tensors="np"
+        )
+        feed = {name: value.astype(np.int64) for name, value in inputs.items() if name in self._input_names}
+        token_embeddings = self.session.run(None, feed)[0]
+
+        # Mean pooling over real tokens, then L2 normalization, as the sentence-transformers pipeline does
+        mask = inputs["attention_mask"][..., None].astype(np.float32)
+        summed = (token_embeddings * mask).sum(axis=1)
+        pooled = summed / np.clip(mask.sum(axis=1), 1e-9, None)
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return (pooled / np.clip(norms, 1e-12, None)).astype(np.float32)
+
+    @property
+    def tokenizer(self):
+        return self._tokenizer
+
+def get_backend_name(backend: str, model_name: str) -> str:
+    """
+    Name a backend without loading it, e.g. for keying caches
+    """
+    if backend == "onnx":
+        return f"{model_name}:onnx-int8"
+    return model_name
+
+def create_embedding_backend(
+    backend: str,
+    model_name: str,
+    onnx_model_dir: Optional[str] = None,
+    onnx_threads: int = 0
+) -> EmbeddingBackend:
+    """
+    Create the embedding backend selected in settings
+    """
+    if backend == "torch":
+        return SentenceTransformerBackend(model_name)
+    if backend == "onnx":
+        if not onnx_model_dir:
+            raise ValueError("EMBEDDING_ONNX_MODEL_DIR must be set to use the onnx embedding backend")
+        return OnnxEmbeddingBackend(model_name, onnx_model_dir, num_threads=onnx_threads)
+    raise ValueError(f"Unsupported embedding backend: {backend}")
+
+def check_backend_parity(
+    reference: EmbeddingBackend,
+    candidate: EmbeddingBackend,
+    texts: List[str],
+    min_cosine: float = 0.99
+) -> float:
+    """
+    Compare two backends on the same texts and return the lowest cosine similarity
+    between their vectors. Raises ValueError if any pair falls below min_cosine.
+    """
+    expected = reference.encode(texts)
+    actual = candidate.encode(texts)
+    if expected.shape != actual.shape:
+        raise ValueError(f"Embedding shapes differ: {expected.shape} vs {actual.shape}")
+
+    expected = expected / np.linalg.norm(expected, axis=1, keepdims=True)
+    actual = actual / np.linalg.norm(actual, axis=1, keepdims=True)
+    similarities = (expected * actual).sum(axis=1)
+    worst = float(similarities.min())
+    if worst < min_cosine:
+        raise ValueError(
+            f"{candidate.name} diverges from {reference.name}: cosine similarity {worst:.4f} "
+            f"for text {texts[int(similarities.argmin())]!r} is below {min_cosine}"
+        )
+    return worst
@@ -0,0 +1,145 @@
+from collections import OrderedDict
+from typing import Dict, List, Optional
+import hashlib
+import os
+import sqlite3
+import threading
+import numpy as np
+
+def normalize_text(text: str) -> str:
+    """Normalize text so trivially different inputs share a cache entry."""
+    return " ".join(text.split())
+
+def make_cache_key(model_name: str, text: str) -> str:
+    """Build the cache key from the model name and normalized text."""
+    return hashlib.sha256(f"{model_name}\0{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+class EmbeddingCache:
+    """
+    Two-tier embedding cache: an in-memory LRU in front of an optional SQLite
+    store that keeps float32 vectors on disk across restarts.
+    """
+
+    def __init__(self, model_name: str, max_entries: int = 10000, db_path: Optional[str] = None):
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.db_path = db_path
+        self._memory: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if self.db_path:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = self._get_connection()
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+            )
+            conn.commit()
+
+    def _get_connection(self) -> sqlite3.Connection:
+        """SQLite connections cannot be shared across threads, so keep one per thread."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _remember(self, key: str, vector: List[float]):
+        with self._lock:
+            self._memory[key] = vector
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _get_from_disk(self, keys: List[str]) -> Dict[str, List[float]]:
+        if not self.db_path or not keys:
+            return {}
+        found = {}
+        try:
+            conn = self._get_connection()
+            # Stay well below SQLite's bound-parameter limit
+            for i in range(0, len(keys), 500):
+                batch = keys[i:i + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    batch
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32).tolist()
+        except Exception as e:
+            print(f"Error reading embedding cache: {str(e)}")
+        return found
+
+    def _put_on_disk(self, items: Dict[str, List[float]]):
+        if not self.db_path or not items:
+            return
+        try:
+            conn = self._get_connection()
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                [(key, np.asarray(vector, dtype=np.float32).tobytes()) for key, vector in items.items()]
+            )
+            conn.commit()
+        except Exception as e:
+            print(f"Error writing embedding cache: {str(e)}")
+
+    def get_many(self, texts: List[str]) -> Dict[int, List[float]]:
+        """
+        Look up several texts and return {position: vector} for the ones that are cached
+        """
+        keys = [make_cache_key(self.model_name, text) for text in texts]
+        found: Dict[int, List[float]] = {}
+        missing: Dict[str, List[int]] = {}
+
+        with self._lock:
+            for position, key in enumerate(keys):
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    found[position] = vector
+                else:
+                    missing.setdefault(key, []).append(position)
+
+        from_disk = self._get_from_disk(list(missing))
+        for key, vector in from_disk.items():
+            self._remember(key, vector)
+            for position in missing[key]:
+                found[position] = vector
+
+        with self._lock:
+            self.hits += len(found)
+            self.disk_hits += sum(len(missing[key]) for key in from_disk)
+            self.misses += len(texts) - len(found)
+        return found
+
+    def put_many(self, texts: List[str], vectors: List[List[float]]):
+        """Store freshly computed vectors in both tiers."""
+        items = {make_cache_key(self.model_name, text): vector for text, vector in zip(texts, vectors)}
+        for key, vector in items.items():
+            self._remember(key, vector)
+        self._put_on_disk(items)
+
+    def clear(self):
+        """Drop the in-memory tier and reset the counters."""
+        with self._lock:
+            self._memory.clear()
+            self.hits = self.disk_hits = self.misses = 0
+
+    def stats(self) -> Dict[str, float]:
+        """Return hit/miss counters for monitoring."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+            }
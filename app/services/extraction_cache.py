@@ -0,0 +1,127 @@
+from collections import OrderedDict
+from typing import Optional, List, Dict, Any, Union, BinaryIO
+import hashlib
+import io
+import json
+import os
+import threading
+import zlib
+
+# Bump when extraction output changes, so older entries are no longer hit
+EXTRACTOR_VERSION = 1
+
+def hash_file(source: Union[str, BinaryIO], chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 of a file on disk or of a binary buffer, read in chunks."""
+    digest = hashlib.sha256()
+    if isinstance(source, io.BytesIO):
+        digest.update(source.getbuffer())
+        return digest.hexdigest()
+    if isinstance(source, str):
+        with open(source, "rb") as file:
+            for chunk in iter(lambda: file.read(chunk_size), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+    position = source.tell()
+    source.seek(0)
+    for chunk in iter(lambda: source.read(chunk_size), b""):
+        digest.update(chunk)
+    source.seek(position)
+    return digest.hexdigest()
+
+class ExtractionCache:
+    """
+    Content-addressed cache of extracted sections: one zlib-compressed JSON
+    file per (file SHA-256, file type), evicted least recently used once the
+    files exceed max_bytes. Several processes can share the directory; each
+    tracks recency for the entries it has seen and tolerates files removed
+    by the others.
+    """
+
+    def __init__(self, root_dir: str, max_bytes: int):
+        self.root_dir = root_dir
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.root_dir, exist_ok=True)
+        self._load()
+
+    def _load(self):
+        # Rebuild recency from modification times, which hits refresh
+        files = []
+        for directory, _, names in os.walk(self.root_dir):
+            for name in names:
+                if name.endswith(".zlib"):
+                    path = os.path.join(directory, name)
+                    stat = os.stat(path)
+                    files.append((stat.st_mtime, name[:-len(".zlib")], stat.st_size))
+        for _, key, size in sorted(files):
+            self._entries[key] = size
+            self._total_bytes += size
+
+    @staticmethod
+    def make_key(file_hash: str, file_type: str) -> str:
+        return f"{file_hash}-{file_type}-v{EXTRACTOR_VERSION}"
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root_dir, key[:2], f"{key}.zlib")
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        """Return cached sections, or None on a miss."""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as file:
+                sections = json.loads(zlib.decompress(file.read()).decode("utf-8"))
+            os.utime(path)
+        except (OSError, ValueError, zlib.error):
+            with self._lock:
+                self.misses += 1
+                self._discard(key)
+            return None
+        with self._lock:
+            self.hits += 1
+            if key in self._entries:
+                self._entries.move_to_end(key)
+        return sections
+
+    def put(self, key: str, sections: List[Dict[str, Any]]):
+        data = zlib.compress(json.dumps(sections).encode("utf-8"))
+        if len(data) > self.max_bytes:
+            return
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as file:
+            file.write(data)
+        os.replace(temp_path, path)
+
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = len(data)
+            self._total_bytes += len(data)
+            while self._total_bytes > self.max_bytes and self._entries:
+                oldest, _ = next(iter(self._entries.items()))
+                self._discard(oldest)
+                try:
+                    os.remove(self._path(oldest))
+                except OSError:
+                    pass
+
+    def _discard(self, key: str):
+        size = self._entries.pop(key, None)
+        if size is not None:
+            self._total_bytes -= size
+
+    def stats(self) -> Dict[str, float]:
+        """Return hit/miss counters and size for monitoring."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+            }
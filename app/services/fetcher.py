@@ -0,0 +1,115 @@
+from typing import Optional, Dict, Any, Tuple
+from selenium.webdriver.remote.webdriver import WebDriver
+from selenium.webdriver.common.by import By
+from app.core.config import settings
+from app.core.http import http_client
+from app.core.selenium import selenium_client
+from app.utils.html_utils import parse_html, needs_javascript
+from app.utils.selenium_utils import navigate_to_url, take_screenshot
+import asyncio
+import httpx
+import os
+import time
+import uuid
+
+# How a bot's pages are fetched: "auto" renders in a browser only pages that
+# look like they need JavaScript, "http" never renders, "browser" always does
+RENDER_MODES = ("auto", "http", "browser")
+
+# Statuses often sent to non-browser clients by bot protection
+BROWSER_RETRY_STATUSES = {401, 403}
+
+def _render_page(driver: WebDriver, url: str) -> Tuple[str, str, str, str]:
+    """Load a page in the browser and return its text, HTML, title and a screenshot path. Blocks."""
+    if not navigate_to_url(driver, url):
+        raise ValueError("Failed to navigate")
+
+    page_text = driver.find_element(By.TAG_NAME, "body").text
+
+    screenshot_dir = "screenshots"
+    os.makedirs(screenshot_dir, exist_ok=True)
+    # Pages load concurrently, so the timestamp alone is not unique
+    screenshot_path = os.path.join(screenshot_dir, f"screenshot_{int(time.time())}_{uuid.uuid4().hex[:8]}.png")
+    take_screenshot(driver, screenshot_path)
+    return page_text, driver.page_source, driver.title, screenshot_path
+
+async def render_page(url: str) -> Dict[str, Any]:
+    """Fetch a page with a pooled WebDriver, running its JavaScript."""
+    async with selenium_client.driver() as driver:
+        text, html, title, screenshot_path = await asyncio.to_thread(_render_page, driver, url)
+    # Validators of a browser-rendered page would not cover the content its scripts load
+    return {
+        "url": url, "text": text, "html": html, "title": title, "rendered": True, "screenshot": screenshot_path,
+        "not_modified": False, "etag": None, "last_modified": None
+    }
+
+def _http_page(response: httpx.Response, text: str, html: Optional[str], title: str) -> Dict[str, Any]:
+    return {
+        "url": str(response.url), "text": text, "html": html, "title": title, "rendered": False, "screenshot": None,
+        "not_modified": response.status_code == 304,
+        "etag": response.headers.get("etag"),
+        "last_modified": response.headers.get("last-modified")
+    }
+
+async def fetch_bytes(
+    url: str,
+    max_bytes: Optional[int] = None,
+    headers: Optional[Dict[str, str]] = None
+) -> Tuple[httpx.Response, bytes]:
+    """
+    GET a URL over the shared HTTP client, reading at most max_bytes
+    (HTTP_MAX_RESPONSE_BYTES by default). Raises httpx.HTTPStatusError for
+    error statuses and ValueError for larger bodies.
+    """
+    max_bytes = settings.HTTP_MAX_RESPONSE_BYTES if max_bytes is None else max_bytes
+    client = await http_client.get_client()
+    async with client.stream("GET", url, headers=headers) as response:
+        response.raise_for_status()
+        body = bytearray()
+        async for chunk in response.aiter_bytes():
+            body.extend(chunk)
+            if len(body) > max_bytes:
+                raise ValueError(f"Response is larger than the {max_bytes} byte limit")
+    return response, bytes(body)
+
+def _decode(response: httpx.Response, body: bytes) -> str:
+    return body.decode(response.encoding or "utf-8", errors="replace")
+
+async def fetch_page(url: str, render_mode: Optional[str] = None, headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """
+    Fetch a page's text with a plain GET, falling back to a pooled WebDriver
+    when render_mode asks for it or, in "auto" mode, when the served HTML
+    looks like it needs JavaScript. Returns {"url", "text", "html", "title",
+    "rendered", "screenshot", "not_modified", "etag", "last_modified"},
+    where text is all visible text and html is None for non-HTML pages;
+    screenshots are only taken of rendered pages. headers can carry
+    conditional request validators; a 304 comes back with not_modified set
+    and no text.
+    """
+    render_mode = render_mode or settings.SCRAPE_RENDER_MODE
+    if render_mode == "browser":
+        return await render_page(url)
+
+    try:
+        response, body = await fetch_bytes(url, headers=headers)
+    except httpx.HTTPStatusError as e:
+        if render_mode == "auto" and e.response.status_code in BROWSER_RETRY_STATUSES:
+            return await render_page(url)
+        raise
+
+    if response.status_code == 304:
+        return _http_page(response, "", None, "")
+
+    content_type = response.headers.get("content-type", "").lower()
+    if "html" not in content_type:
+        if content_type.startswith("text/"):
+            return _http_page(response, _decode(response, body), None, "")
+        raise ValueError(f"Unsupported content type: {content_type or 'unknown'}")
+
+    # Parsing large pages takes a while; keep it off the event loop
+    html = _decode(response, body)
+    parser = await asyncio.to_thread(parse_html, html)
+    text = parser.get_text()
+    if render_mode == "auto" and needs_javascript(parser, text, settings.SCRAPE_MIN_TEXT_CHARS):
+        return await render_page(url)
+    return _http_page(response, text, html, parser.title.strip())
@@ -0,0 +1,124 @@
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import flag_modified
+from sqlalchemy.sql import func
+from datetime import datetime, timedelta, timezone
+from typing import Optional, List, Dict, Any
+import uuid
+from app.core.config import settings
+from app.models.ingestion_job import IngestionJob
+
+def create_job(db: Session, chatbot_id: int, kind: str, payload: Dict[str, Any]) -> IngestionJob:
+    """Create a queued ingestion job"""
+    job = IngestionJob(
+        id=str(uuid.uuid4()),
+        chatbot_id=chatbot_id,
+        kind=kind,
+        status="queued",
+        payload=payload,
+        total_items=0,
+        processed_items=0,
+        failed_items=0,
+        errors=[],
+        attempts=0
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+def get_job(db: Session, job_id: str) -> Optional[IngestionJob]:
+    return db.query(IngestionJob).filter(IngestionJob.id == job_id).first()
+
+def claim_next_job(db: Session) -> Optional[IngestionJob]:
+    """
+    Atomically take the oldest queued job, or a running job whose worker stopped
+    sending heartbeats (e.g. the process was restarted), and mark it running.
+    SKIP LOCKED lets several API processes share the queue.
+    """
+    stale_before = datetime.now(timezone.utc) - timedelta(seconds=settings.INGESTION_STALE_JOB_SECONDS)
+    job = db.query(IngestionJob)\
+        .filter(or_(
+            IngestionJob.status == "queued",
+            (IngestionJob.status == "running") & (IngestionJob.updated_at < stale_before)
+        ))\
+        .order_by(IngestionJob.created_at)\
+        .with_for_update(skip_locked=True)\
+        .first()
+    if not job:
+        db.commit()
+        return None
+
+    if job.status == "running":
+        # The job starts over, so drop the progress the previous worker reported
+        job.total_items = 0
+        job.processed_items = 0
+        job.failed_items = 0
+        job.errors = []
+    job.status = "running"
+    job.attempts += 1
+    job.started_at = job.started_at or func.now()
+    job.updated_at = func.now()
+    db.commit()
+    db.refresh(job)
+    return job
+
+def heartbeat_job(db: Session, job_id: str):
+    """Show that the job's worker is still alive"""
+    db.query(IngestionJob)\
+        .filter(IngestionJob.id == job_id, IngestionJob.status == "running")\
+        .update({IngestionJob.updated_at: func.now()}, synchronize_session=False)
+    db.commit()
+
+def update_job_progress(
+    db: Session,
+    job_id: str,
+    total: Optional[int] = None,
+    processed: int = 0,
+    failed: int = 0,
+    errors: Optional[List[Dict[str, Any]]] = None
+):
+    """Add to a job's counters and record per-item errors"""
+    job = get_job(db, job_id)
+    if not job:
+        return
+    if total is not None:
+        job.total_items = total
+    job.processed_items += processed
+    job.failed_items += failed
+    if errors:
+        # Keep the error list bounded for jobs with many failing items
+        job.errors = (list(job.errors or []) + errors)[:settings.INGESTION_MAX_ERRORS]
+        flag_modified(job, "errors")
+    job.updated_at = func.now()
+    db.commit()
+
+def requeue_job(db: Session, job_id: str):
+    """Put a running job back in the queue, e.g. when its worker shuts down, dropping its partial progress"""
+    db.query(IngestionJob)\
+        .filter(IngestionJob.id == job_id, IngestionJob.status == "running")\
+        .update({
+            IngestionJob.status: "queued",
+            IngestionJob.total_items: 0,
+            IngestionJob.processed_items: 0,
+            IngestionJob.failed_items: 0,
+            IngestionJob.errors: [],
+            # Being interrupted by a shutdown does not count as a failed attempt
+            IngestionJob.attempts: IngestionJob.attempts - 1,
+            IngestionJob.updated_at: func.now()
+        }, synchronize_session=False)
+    db.commit()
+
+def finish_job(db: Session, job_id: str, status: str, result: Optional[Dict[str, Any]] = None, error: Optional[str] = None):
+    """Mark a job completed or failed"""
+    job = get_job(db, job_id)
+    if not job:
+        return
+    job.status = status
+    job.result = result
+    if error:
+        job.errors = (list(job.errors or []) + [{"item": None, "error": error}])[:settings.INGESTION_MAX_ERRORS]
+        flag_modified(job, "errors")
+    job.finished_at = func.now()
+    job.updated_at = func.now()
+    db.commit()
@@ -0,0 +1,350 @@
+from typing import Optional, List, Dict, Any, Set
+from starlette.concurrency import iterate_in_threadpool
+import asyncio
+import os
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.schemas.document import DocumentCreate
+from app.services.archive import iter_archive_entries
+from app.services.chatbot import get_chatbot, get_scrape_options
+from app.services.document import create_document_async, create_document_from_sections_async, create_documents_async
+from app.services.document_processor import iter_text_sections, extract_sections_from_bytes_async
+from app.services.ingestion_job import claim_next_job, heartbeat_job, update_job_progress, finish_job, requeue_job
+from app.services.scraper import process_sitemap_urls
+from app.services.sitemap import iter_sitemap_urls
+
+def _with_session(fn, *args, **kwargs):
+    """Run a job-store function with its own short-lived session, for use from worker threads"""
+    db = SessionLocal()
+    try:
+        return fn(db, *args, **kwargs)
+    finally:
+        db.close()
+
+def _claim_job() -> Optional[Dict[str, Any]]:
+    job = _with_session(claim_next_job)
+    if job is None:
+        return None
+    return {
+        "id": job.id,
+        "chatbot_id": job.chatbot_id,
+        "kind": job.kind,
+        "payload": job.payload,
+        "attempts": job.attempts
+    }
+
+async def _report(job_id: str, **progress):
+    await asyncio.to_thread(_with_session, update_job_progress, job_id, **progress)
+
+async def _run_document_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Extract, chunk, embed and index an uploaded file"""
+    payload = job["payload"]
+    await _report(job["id"], total=1)
+    try:
+        db = SessionLocal()
+        try:
+            if payload.get("sections"):
+                # Small uploads were already extracted in the request
+                content = '\n'.join(section["text"] for section in payload["sections"])
+                document = await create_document_async(
+                    db=db,
+                    document=DocumentCreate(
+                        chatbot_id=job["chatbot_id"],
+                        content=content,
+                        source=payload["filename"],
+                        metadata={
+                            "filename": payload["filename"],
+                            "file_type": payload["file_type"],
+                            "original_size": len(content)
+                        }
+                    ),
+                    sections=payload["sections"]
+                )
+            else:
+                # Pages are chunked and indexed as they are extracted
+                document = await create_document_from_sections_async(
+                    db=db,
+                    chatbot_id=job["chatbot_id"],
+                    sections=iter_text_sections(payload["file_path"], payload["file_type"], cleanup=False),
+                    metadata={
+                        "filename": payload["filename"],
+                        "file_type": payload["file_type"]
+                    },
+                    source=payload["filename"]
+                )
+        finally:
+            db.close()
+    except Exception:
+        # The error itself is recorded when the job is marked failed
+        await _report(job["id"], failed=1)
+        raise
+
+    await _report(job["id"], processed=1)
+    return {
+        "document_id": document.id,
+        "chunk_count": document.chunk_count,
+        "skipped_chunks": document.skipped_chunks,
+        "unchanged_chunks": document.unchanged_chunks,
+        "deleted_chunks": document.deleted_chunks
+    }
+
+async def _run_sitemap_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Scrape the URLs of a sitemap into the bot's index while the sitemap is still being read"""
+    payload = job["payload"]
+    chatbot = await asyncio.to_thread(_with_session, get_chatbot, job["chatbot_id"])
+    options = get_scrape_options(chatbot) if chatbot else {}
+
+    async def on_batch(results: List[dict]):
+        failed = [result for result in results if result["status"] != "success"]
+        await _report(
+            job["id"],
+            processed=len(results) - len(failed),
+            failed=len(failed),
+            errors=[{"item": result["url"], "error": result.get("error", "Unknown error")} for result in failed]
+        )
+
+    entries = iter_sitemap_urls(payload["sitemap_url"], limit=payload["limit"])
+    summary = await process_sitemap_urls(
+        entries,
+        job["chatbot_id"],
+        on_batch=on_batch,
+        options=options,
+        force=payload.get("force", False)
+    )
+    # The number of URLs is only known once the sitemap has been read to the end
+    await _report(job["id"], total=summary["processed"])
+    stripped_ratio = summary["stripped_chars"] / summary["original_chars"] if summary["original_chars"] else 0.0
+    return {"total_urls": summary["processed"], **summary, "stripped_ratio": round(stripped_ratio, 3), "limit": payload["limit"]}
+
+async def _run_archive_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Index every supported file of a ZIP or TAR archive. Entries are read one
+    at a time, up to ARCHIVE_PARALLEL_FILES are extracted concurrently, and
+    all of them feed a single embedding and indexing pipeline. Progress is
+    reported per file as it fails or finishes indexing.
+    """
+    payload = job["payload"]
+    files: List[Dict[str, Any]] = []
+    queue: asyncio.Queue = asyncio.Queue(maxsize=settings.ARCHIVE_PARALLEL_FILES)
+
+    async def report_failed(summary: Dict[str, Any]):
+        await _report(job["id"], failed=1, errors=[{"item": summary["filename"], "error": summary["error"]}])
+
+    async def read_entries():
+        try:
+            entries = iter_archive_entries(
+                payload["file_path"],
+                payload["archive_type"],
+                settings.MAX_UPLOAD_SIZE_BYTES,
+                settings.ARCHIVE_MAX_FILES
+            )
+            async for entry in iterate_in_threadpool(entries):
+                summary = {"filename": entry["name"], "status": "failed", "error": entry["error"]}
+                files.append(summary)
+                extraction = None
+                if entry["error"] is None:
+                    extraction = asyncio.ensure_future(extract_sections_from_bytes_async(entry["data"], entry["file_type"]))
+                await queue.put((entry, summary, extraction))
+                await _report(job["id"], total=len(files))
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Let the pipeline finish with what was read; the error is raised when the reader is awaited
+            await queue.put(None)
+            raise
+        await queue.put(None)
+
+    # Summaries of the files handed to the pipeline, in order
+    extracted: List[Dict[str, Any]] = []
+
+    async def documents():
+        while True:
+            queued = await queue.get()
+            if queued is None:
+                return
+            entry, summary, extraction = queued
+            if extraction is None:
+                await report_failed(summary)
+                continue
+            try:
+                sections = await extraction
+            except Exception:
+                sections = None
+            if not sections:
+                summary["error"] = "Could not extract text from the file"
+                await report_failed(summary)
+                continue
+            content = '\n'.join(section["text"] for section in sections)
+            extracted.append(summary)
+            yield DocumentCreate(
+                chatbot_id=job["chatbot_id"],
+                content=content,
+                source=entry["name"],
+                metadata={
+                    "filename": entry["name"],
+                    "file_type": entry["file_type"],
+                    "archive": payload["filename"],
+                    "original_size": len(content)
+                }
+            ), sections
+
+    async def on_document(position: int, document):
+        summary = extracted[position]
+        if isinstance(document, Exception):
+            summary["error"] = str(document)
+            await report_failed(summary)
+            return
+        summary.update(
+            status="success",
+            error=None,
+            document_id=document.id,
+            chunk_count=document.chunk_count,
+            skipped_chunks=document.skipped_chunks,
+            unchanged_chunks=document.unchanged_chunks,
+            deleted_chunks=document.deleted_chunks
+        )
+        await _report(job["id"], processed=1)
+
+    reader = asyncio.create_task(read_entries())
+    db = SessionLocal()
+    try:
+        await create_documents_async(db, job["chatbot_id"], documents(), on_document=on_document)
+        # Surface archive errors such as a corrupt file or too many entries
+        await reader
+    finally:
+        db.close()
+        reader.cancel()
+
+    failed = [summary for summary in files if summary["status"] != "success"]
+    return {
+        "archive": payload["filename"],
+        "total_files": len(files),
+        "succeeded": len(files) - len(failed),
+        "failed": len(failed),
+        "files": files
+    }
+
+JOB_HANDLERS = {
+    "document": _run_document_job,
+    "sitemap": _run_sitemap_job,
+    "archive": _run_archive_job,
+}
+
+def _cleanup_job(job: Dict[str, Any]):
+    """Remove files a finished job no longer needs"""
+    file_path = job["payload"].get("file_path")
+    if file_path and os.path.exists(file_path):
+        os.remove(file_path)
+
+class IngestionWorker:
+    """
+    Runs queued ingestion jobs in the background with at most `concurrency`
+    jobs per process. Jobs live in Postgres, so they survive restarts: each
+    worker claims jobs with SELECT ... FOR UPDATE SKIP LOCKED, keeps a
+    heartbeat while running, and jobs whose heartbeat stops (the process
+    died) are claimed again after INGESTION_STALE_JOB_SECONDS. Jobs
+    interrupted by stop() are queued again right away.
+    """
+
+    def __init__(self, concurrency: int, poll_interval: float, max_attempts: int):
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self._tasks: List[asyncio.Task] = []
+        # Ids of the jobs being processed by this process
+        self._active: Set[str] = set()
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def start(self):
+        """Start the worker tasks on the running event loop"""
+        if self._tasks or self.concurrency <= 0:
+            return
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._run()) for _ in range(self.concurrency)]
+
+    def enqueue(self):
+        """Wake idle workers after a job was created in this process"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def stop(self):
+        """Cancel the worker tasks and put the jobs they were running back in the queue."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        interrupted, self._active = self._active, set()
+        for job_id in interrupted:
+            try:
+                await asyncio.to_thread(_with_session, requeue_job, job_id)
+            except Exception as e:
+                # The job is still picked up again once its heartbeat is stale
+                print(f"Error requeueing job {job_id}: {str(e)}")
+
+    async def _run(self):
+        while True:
+            claim = asyncio.ensure_future(asyncio.to_thread(_claim_job))
+            try:
+                job = await asyncio.shield(claim)
+            except asyncio.CancelledError:
+                # The claim still commits in its thread; make sure stop() requeues what it took
+                claimed = (await asyncio.gather(claim, return_exceptions=True))[0]
+                if isinstance(claimed, dict):
+                    self._active.add(claimed["id"])
+                raise
+            except Exception as e:
+                print(f"Error claiming ingestion job: {str(e)}")
+                job = None
+
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                continue
+
+            await self._process(job)
+
+    async def _heartbeat(self, job_id: str):
+        interval = max(1.0, settings.INGESTION_STALE_JOB_SECONDS / 3)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(_with_session, heartbeat_job, job_id)
+            except Exception as e:
+                print(f"Error updating heartbeat of job {job_id}: {str(e)}")
+
+    async def _process(self, job: Dict[str, Any]):
+        self._active.add(job["id"])
+        heartbeat = asyncio.create_task(self._heartbeat(job["id"]))
+        try:
+            if job["attempts"] > self.max_attempts:
+                raise RuntimeError(f"Gave up after {self.max_attempts} attempts")
+            handler = JOB_HANDLERS.get(job["kind"])
+            if handler is None:
+                raise ValueError(f"Unknown job kind: {job['kind']}")
+            result = await handler(job)
+            status, error = "completed", None
+        except asyncio.CancelledError:
+            # Shutting down: stop() requeues the job, which stays in _active
+            raise
+        except Exception as e:
+            result, status, error = None, "failed", str(e)
+        finally:
+            heartbeat.cancel()
+
+        self._active.discard(job["id"])
+        try:
+            await asyncio.to_thread(_with_session, finish_job, job["id"], status, result=result, error=error)
+            await asyncio.to_thread(_cleanup_job, job)
+        except Exception as e:
+            print(f"Error finishing job {job['id']}: {str(e)}")
+
+# Create a singleton instance
+ingestion_worker = IngestionWorker(
+    concurrency=settings.INGESTION_CONCURRENCY,
+    poll_interval=settings.INGESTION_POLL_INTERVAL_SECONDS,
+    max_attempts=settings.INGESTION_MAX_ATTEMPTS
+)
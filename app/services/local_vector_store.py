@@ -0,0 +1,225 @@
+from typing import Optional, Dict, Any, List
+from datetime import datetime
+import json
+import os
+import shutil
+import threading
+import uuid
+import numpy as np
+from app.services.vector_store import VectorStore
+
+# Rows scored per step, so large bots never materialize the whole matrix as float32
+SEARCH_BLOCK_ROWS = 65536
+
+class _LocalIndex:
+    """
+    One bot's documents: a float16 matrix of unit vectors in vectors.f16,
+    memory-mapped for search, and one JSON line per row in documents.jsonl.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.vectors_path = os.path.join(path, "vectors.f16")
+        self.documents_path = os.path.join(path, "documents.jsonl")
+        self.lock = threading.RLock()
+        self.documents: List[Dict[str, Any]] = []
+        self.dims: Optional[int] = None
+        self._matrix: Optional[np.memmap] = None
+
+        with open(self.documents_path, "r", encoding="utf-8") as file:
+            self.documents = [json.loads(line) for line in file if line.strip()]
+        if self.documents:
+            rows = len(self.documents)
+            self.dims = os.path.getsize(self.vectors_path) // (rows * np.dtype(np.float16).itemsize)
+
+    def matrix(self) -> Optional[np.memmap]:
+        if self._matrix is None and self.documents:
+            self._matrix = np.memmap(
+                self.vectors_path,
+                dtype=np.float16,
+                mode="r",
+                shape=(len(self.documents), self.dims)
+            )
+        return self._matrix
+
+    def append(self, records: List[Dict[str, Any]], embeddings: List[List[float]]):
+        """Append rows, replacing the existing rows with the same ids."""
+        vectors = np.asarray(embeddings, dtype=np.float32).reshape(len(records), -1)
+        vectors = vectors / np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+
+        with self.lock:
+            self.remove({record["id"] for record in records})
+            if self.dims is None:
+                self.dims = vectors.shape[1]
+            elif vectors.shape[1] != self.dims:
+                raise ValueError(f"Embedding has {vectors.shape[1]} dimensions, index expects {self.dims}")
+            with open(self.vectors_path, "ab") as file:
+                file.write(vectors.astype(np.float16).tobytes())
+            with open(self.documents_path, "a", encoding="utf-8") as file:
+                file.writelines(json.dumps(record) + "\n" for record in records)
+            self.documents.extend(records)
+            # The mapping has a fixed shape, remap on the next search
+            self._matrix = None
+
+    def remove(self, ids: set) -> int:
+        """
+        Drop rows by id, rewriting both files. The new files replace the old
+        ones atomically, so searches still mapping the old matrix are unaffected.
+        """
+        with self.lock:
+            keep = [i for i, document in enumerate(self.documents) if document["id"] not in ids]
+            removed = len(self.documents) - len(keep)
+            if not removed:
+                return 0
+            vectors = np.asarray(self.matrix()[keep]) if keep else np.empty((0, self.dims), dtype=np.float16)
+            documents = [self.documents[i] for i in keep]
+
+            with open(self.vectors_path + ".tmp", "wb") as file:
+                file.write(vectors.astype(np.float16).tobytes())
+            with open(self.documents_path + ".tmp", "w", encoding="utf-8") as file:
+                file.writelines(json.dumps(document) + "\n" for document in documents)
+            os.replace(self.vectors_path + ".tmp", self.vectors_path)
+            os.replace(self.documents_path + ".tmp", self.documents_path)
+            self.documents = documents
+            self._matrix = None
+            return removed
+
+    def top_k(self, query_embedding: List[float], size: int) -> List[tuple]:
+        with self.lock:
+            matrix = self.matrix()
+            documents = self.documents
+        if matrix is None or size <= 0:
+            return []
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+        scores = np.empty(matrix.shape[0], dtype=np.float32)
+        for start in range(0, matrix.shape[0], SEARCH_BLOCK_ROWS):
+            block = matrix[start:start + SEARCH_BLOCK_ROWS]
+            scores[start:start + block.shape[0]] = block.astype(np.float32) @ query
+
+        size = min(size, scores.shape[0])
+        top = np.argpartition(-scores, size - 1)[:size]
+        top = top[np.argsort(-scores[top])]
+        return [(documents[i], float(scores[i])) for i in top]
+
+class LocalVectorStore(VectorStore):
+    """
+    Embedded vector store for small bots and for running without
+    Elasticsearch: exact dot-product top-k over a memory-mapped float16 matrix
+    per bot. Every search mode is served by the same exact vector ranking;
+    scores use the kNN scale, (1 + cosine) / 2.
+    """
+
+    def __init__(self, root_dir: str):
+        self.root_dir = root_dir
+        self._indexes: Dict[str, _LocalIndex] = {}
+        self._lock = threading.Lock()
+        os.makedirs(self.root_dir, exist_ok=True)
+
+    def _index_path(self, index_id: str) -> str:
+        if not index_id or os.path.basename(index_id) != index_id or index_id.startswith("."):
+            raise ValueError(f"Invalid index id: {index_id}")
+        return os.path.join(self.root_dir, index_id)
+
+    def _get_index(self, index_id: str) -> _LocalIndex:
+        with self._lock:
+            index = self._indexes.get(index_id)
+            if index is None:
+                path = self._index_path(index_id)
+                if not os.path.isdir(path):
+                    raise ValueError(f"Index {index_id} does not exist")
+                index = self._indexes[index_id] = _LocalIndex(path)
+            return index
+
+    def create_index(self, index_id: str) -> bool:
+        try:
+            path = self._index_path(index_id)
+            os.makedirs(path)
+            open(os.path.join(path, "vectors.f16"), "wb").close()
+            open(os.path.join(path, "documents.jsonl"), "w").close()
+            return True
+        except Exception as e:
+            print(f"Error creating index {index_id}: {str(e)}")
+            return False
+
+    def delete_index(self, index_id: str) -> bool:
+        try:
+            path = self._index_path(index_id)
+            with self._lock:
+                self._indexes.pop(index_id, None)
+            shutil.rmtree(path)
+            return True
+        except Exception as e:
+            print(f"Error deleting index {index_id}: {str(e)}")
+            return False
+
+    def index_exists(self, index_id: str) -> bool:
+        return os.path.isdir(self._index_path(index_id))
+
+    @staticmethod
+    def _record(document: Dict[str, Any]) -> Dict[str, Any]:
+        created_at = document.get("created_at") or datetime.utcnow()
+        record = {
+            "id": document.get("id") or uuid.uuid4().hex,
+            "content": document["content"],
+            "metadata": document.get("metadata") or {},
+            "created_at": created_at.isoformat() if isinstance(created_at, datetime) else created_at
+        }
+        for field in ("source", "content_hash"):
+            if document.get(field) is not None:
+                record[field] = document[field]
+        return record
+
+    def add(self, index_id: str, document: Dict[str, Any]) -> str:
+        record = self._record(document)
+        self._get_index(index_id).append([record], [document["embedding"]])
+        return record["id"]
+
+    def bulk_add(self, index_id: str, documents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if not documents:
+            return []
+        try:
+            records = [self._record(document) for document in documents]
+            # One write per file for the whole batch
+            self._get_index(index_id).append(records, [document["embedding"] for document in documents])
+            return [{"id": record["id"], "status": "success"} for record in records]
+        except Exception as e:
+            return [{"id": None, "status": "failed", "error": str(e)} for _ in documents]
+
+    def delete(self, index_id: str, ids: List[str]) -> int:
+        if not ids:
+            return 0
+        return self._get_index(index_id).remove(set(ids))
+
+    def get_source_hashes(self, index_id: str, source: str) -> Dict[str, str]:
+        index = self._get_index(index_id)
+        with index.lock:
+            return {
+                document["id"]: document.get("content_hash")
+                for document in index.documents
+                if document.get("source") == source
+            }
+
+    def search(
+        self,
+        index_id: str,
+        query: str,
+        query_embedding: List[float],
+        size: int = 10,
+        mode: Optional[str] = None,
+        k: Optional[int] = None,
+        num_candidates: Optional[int] = None,
+        lexical_weight: Optional[float] = None,
+        vector_weight: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        return [
+            {
+                "id": record["id"],
+                "content": record["content"],
+                "metadata": record.get("metadata", {}),
+                "created_at": record.get("created_at"),
+                "score": (1.0 + score) / 2.0
+            }
+            for record, score in self._get_index(index_id).top_k(query_embedding, size)
+        ]
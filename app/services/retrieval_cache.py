@@ -0,0 +1,100 @@
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Tuple
+import threading
+import time
+from app.services.embedding_cache import normalize_text
+
+class RetrievalCache:
+    """
+    TTL + LRU cache of search results keyed by (index, generation, normalized
+    query, size, search options). Writes to an index bump its generation, so
+    earlier entries can no longer be hit and simply age out.
+
+    Generations are per process: with several workers, a write only
+    invalidates the worker that made it, and the TTL bounds staleness elsewhere.
+
+    Writes only become searchable at the index's next refresh, so for
+    settle_seconds after an invalidation nothing is cached for that index;
+    results from before the refresh would otherwise be cached for the full TTL.
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl_seconds: float = 300.0, settle_seconds: float = 1.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.settle_seconds = settle_seconds
+        self._entries: "OrderedDict[Tuple, Tuple[float, List[Dict[str, Any]]]]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self._settled_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    def _key(self, index_id: str, query: str, size: int, options: Dict[str, Any]) -> Tuple:
+        return (
+            index_id,
+            self._generations.get(index_id, 0),
+            normalize_text(query).lower(),
+            size,
+            tuple(sorted(options.items()))
+        )
+
+    def get(self, index_id: str, query: str, size: int, options: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+        """Return cached hits, or None on a miss."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            key = self._key(index_id, query, size, options)
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return [dict(hit) for hit in entry[1]]
+
+    def put(self, index_id: str, query: str, size: int, options: Dict[str, Any], hits: List[Dict[str, Any]], generation: int):
+        """
+        Store hits computed while the index was at `generation`. Results that
+        raced with a write, or that may predate its refresh, are dropped
+        instead of being cached under the new generation.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            if self._generations.get(index_id, 0) != generation:
+                return
+            if self._settled_at.get(index_id, 0.0) > time.monotonic():
+                return
+            self._settled_at.pop(index_id, None)
+            key = self._key(index_id, query, size, options)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, [dict(hit) for hit in hits])
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def generation(self, index_id: str) -> int:
+        with self._lock:
+            return self._generations.get(index_id, 0)
+
+    def invalidate(self, index_id: str):
+        """Make every cached result for the index unreachable, and stop caching until the write is searchable."""
+        with self._lock:
+            self._generations[index_id] = self._generations.get(index_id, 0) + 1
+            self._settled_at[index_id] = time.monotonic() + self.settle_seconds
+
+    def stats(self) -> Dict[str, float]:
+        """Return hit/miss counters for monitoring."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+            }
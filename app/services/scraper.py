@@ -0,0 +1,183 @@
+from typing import List, Dict, Any, Optional, Callable, Awaitable, AsyncIterable
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.services.document import create_document_async
+from app.models.crawl_state import CrawlState
+from app.services.crawl_state import get_crawl_state, conditional_headers, save_crawl_state
+from app.services.content_extraction import extract_main_content
+from app.services.crawler import CrawlScheduler, crawl_scheduler
+from app.services.fetcher import fetch_page
+from app.schemas.document import DocumentCreate
+import asyncio
+import hashlib
+
+def _unchanged_result(url: str, state: CrawlState) -> dict:
+    return {
+        "url": url,
+        "status": "success",
+        "unchanged": True,
+        "document_id": state.document_id,
+        "rendered": False,
+        "skipped_chunks": 0,
+        "unchanged_chunks": 0,
+        "screenshot": None,
+        "content": None
+    }
+
+def _page_content(page: Dict[str, Any], options: Dict[str, Any]) -> Dict[str, Any]:
+    """Main content of a fetched page and how much text was stripped around it"""
+    if page["html"] is None or not settings.CONTENT_EXTRACTION_ENABLED:
+        chars = len(page["text"])
+        return {"text": page["text"], "method": "none", "original_chars": chars, "content_chars": chars, "stripped_chars": 0}
+    return extract_main_content(page["html"], options.get("include_selectors"), options.get("exclude_selectors"))
+
+async def process_url(
+    url: str,
+    chatbot_id: int,
+    db: Session,
+    options: Optional[Dict[str, Any]] = None,
+    lastmod: Optional[str] = None,
+    scheduler: Optional[CrawlScheduler] = None,
+    force: bool = False
+) -> dict:
+    """
+    Process a single URL and store its main content, without navigation
+    and other boilerplate (see extract_main_content). Pages are fetched over
+    HTTP and only rendered in a pooled WebDriver when needed (see
+    fetch_page), paced by scheduler when one is given. options are the
+    bot's scrape options (see get_scrape_options).
+
+    Pages indexed before are skipped without a request when the sitemap
+    lastmod is unchanged, and otherwise fetched with the stored ETag /
+    Last-Modified; a 304 or identical content skips indexing. force
+    re-indexes regardless, e.g. after changing the bot's content selectors.
+    """
+    options = options or {}
+    render_mode = options.get("render_mode")
+    try:
+        state = None if force else await asyncio.to_thread(get_crawl_state, db, chatbot_id, url)
+        if state and state.content_hash and lastmod and state.lastmod == lastmod:
+            return _unchanged_result(url, state)
+
+        headers = conditional_headers(state)
+        page = await (scheduler.fetch(url, render_mode, headers) if scheduler else fetch_page(url, render_mode, headers))
+        validators = {"etag": page["etag"], "last_modified": page["last_modified"], "lastmod": lastmod}
+        if page["not_modified"]:
+            # Read the state before saving; the commit expires it and reloading would query on the event loop
+            result = _unchanged_result(url, state)
+            await asyncio.to_thread(save_crawl_state, db, chatbot_id, url, lastmod=lastmod or state.lastmod)
+            return result
+
+        # Extraction walks the whole DOM; keep it off the event loop
+        content = await asyncio.to_thread(_page_content, page, options)
+        content_hash = hashlib.sha256(content["text"].encode("utf-8")).hexdigest()
+        if state and state.content_hash == content_hash:
+            result = _unchanged_result(url, state)
+            await asyncio.to_thread(save_crawl_state, db, chatbot_id, url, **validators)
+            return result
+
+        metadata = {
+            "url": url,
+            "title": page["title"],
+            "type": "webpage",
+            "rendered": page["rendered"],
+            "content_method": content["method"]
+        }
+        if page["screenshot"]:
+            metadata["screenshot"] = page["screenshot"]
+        if lastmod:
+            metadata["lastmod"] = lastmod
+        document = await create_document_async(
+            db=db,
+            document=DocumentCreate(
+                chatbot_id=chatbot_id,
+                content=content["text"],
+                source=url,
+                metadata=metadata
+            )
+        )
+
+        await asyncio.to_thread(save_crawl_state, db, chatbot_id, url, content_hash=content_hash, document_id=document.id, **validators)
+
+        return {
+            "url": url,
+            "status": "success",
+            "unchanged": False,
+            "document_id": document.id,
+            "rendered": page["rendered"],
+            "skipped_chunks": document.skipped_chunks,
+            "unchanged_chunks": document.unchanged_chunks,
+            "screenshot": page["screenshot"],
+            "content": {key: value for key, value in content.items() if key != "text"}
+        }
+    except Exception as e:
+        return {"url": url, "status": "failed", "error": str(e)}
+
+async def _process_url_with_session(
+    entry: Dict[str, Optional[str]],
+    chatbot_id: int,
+    options: Dict[str, Any],
+    force: bool
+) -> dict:
+    # Concurrent pages each need their own session; Session objects are not shareable
+    db = SessionLocal()
+    try:
+        return await process_url(entry["loc"], chatbot_id, db, options, entry.get("lastmod"), crawl_scheduler, force)
+    finally:
+        db.close()
+
+async def process_sitemap_urls(
+    entries: AsyncIterable[Dict[str, Optional[str]]],
+    chatbot_id: int,
+    on_batch: Optional[Callable[[List[dict]], Awaitable[None]]] = None,
+    options: Optional[Dict[str, Any]] = None,
+    force: bool = False
+) -> Dict[str, Any]:
+    """
+    Scrape sitemap entries ({"loc", "lastmod"}, e.g. from iter_sitemap_urls)
+    as they are read, keeping up to SCRAPE_CONCURRENCY pages in flight and
+    pacing each host through the crawl scheduler. Unchanged pages are
+    skipped unless force is set (see process_url). on_batch is called with
+    the results of the pages that finished together, so callers can report
+    progress. Returns totals rather than per-page results, so large
+    sitemaps use flat memory.
+    """
+    summary = {
+        "processed": 0, "succeeded": 0, "unchanged_pages": 0, "rendered": 0, "skipped_chunks": 0, "unchanged_chunks": 0,
+        "original_chars": 0, "content_chars": 0, "stripped_chars": 0
+    }
+    pending = set()
+
+    async def collect():
+        nonlocal pending
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        batch_results = [task.result() for task in done]
+        for result in batch_results:
+            summary["processed"] += 1
+            if result["status"] == "success":
+                summary["succeeded"] += 1
+                summary["unchanged_pages"] += 1 if result["unchanged"] else 0
+                summary["rendered"] += 1 if result["rendered"] else 0
+                summary["skipped_chunks"] += result["skipped_chunks"] or 0
+                summary["unchanged_chunks"] += result["unchanged_chunks"] or 0
+                for key in ("original_chars", "content_chars", "stripped_chars"):
+                    summary[key] += result["content"][key] if result["content"] else 0
+        if on_batch:
+            await on_batch(batch_results)
+
+    concurrency = max(1, settings.SCRAPE_CONCURRENCY)
+    try:
+        async for entry in entries:
+            pending.add(asyncio.ensure_future(_process_url_with_session(entry, chatbot_id, options or {}, force)))
+            if len(pending) >= concurrency:
+                await collect()
+        while pending:
+            await collect()
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+    summary["failed"] = summary["processed"] - summary["succeeded"]
+    return summary
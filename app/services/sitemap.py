@@ -0,0 +1,135 @@
+from typing import Optional, Dict, List, AsyncIterator, Set
+from xml.etree.ElementTree import XMLPullParser
+from app.core.config import settings
+from app.core.http import http_client
+import zlib
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+def _local_name(tag: str) -> str:
+    # Some sitemaps use no namespace or an old one, so match on the local name
+    return tag.rsplit("}", 1)[-1]
+
+def _child_text(element, name: str) -> Optional[str]:
+    for child in element:
+        if _local_name(child.tag) == name and child.text:
+            return child.text.strip()
+    return None
+
+class SitemapParser:
+    """
+    Incremental parser for one sitemap or sitemap index. Feed it raw bytes,
+    gzip-compressed or not, as they arrive; every completed <url> or
+    <sitemap> entry is handed back and then dropped from the tree, so memory
+    stays flat however many entries the file has.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.is_index = False
+        self._parser = XMLPullParser(events=("start", "end"))
+        self._root = None
+        self._decompressor = None
+        self._started = False
+
+    def feed(self, data: bytes) -> List[Dict[str, Optional[str]]]:
+        if not self._started:
+            self._started = True
+            # .xml.gz files are usually served without Content-Encoding, so sniff the magic bytes
+            if data.startswith(GZIP_MAGIC):
+                self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        if self._decompressor is not None:
+            # Bound each step so a small gzip bomb cannot expand past the limit in one call
+            data = self._decompressor.decompress(data, self.max_bytes - self.size + 1)
+            if self._decompressor.unconsumed_tail:
+                raise ValueError(f"Sitemap is larger than the {self.max_bytes} byte limit")
+        self.size += len(data)
+        if self.size > self.max_bytes:
+            raise ValueError(f"Sitemap is larger than the {self.max_bytes} byte limit")
+        self._parser.feed(data)
+        return self._entries()
+
+    def close(self) -> List[Dict[str, Optional[str]]]:
+        self._parser.close()
+        return self._entries()
+
+    def _entries(self) -> List[Dict[str, Optional[str]]]:
+        entries = []
+        for event, element in self._parser.read_events():
+            if event == "start":
+                if self._root is None:
+                    self._root = element
+                    self.is_index = _local_name(element.tag) == "sitemapindex"
+                continue
+            if _local_name(element.tag) not in ("url", "sitemap"):
+                continue
+            loc = _child_text(element, "loc")
+            if loc:
+                entries.append({"loc": loc, "lastmod": _child_text(element, "lastmod")})
+            # Completed entries are children of the root; drop them to keep memory flat
+            del self._root[:]
+        return entries
+
+async def _stream_sitemap(sitemap_url: str, max_bytes: int) -> AsyncIterator[Dict[str, Optional[str]]]:
+    parser = SitemapParser(max_bytes)
+    client = await http_client.get_client()
+    async with client.stream("GET", sitemap_url) as response:
+        response.raise_for_status()
+        async for chunk in response.aiter_bytes():
+            for entry in parser.feed(chunk):
+                entry["sitemap"] = parser.is_index
+                yield entry
+    for entry in parser.close():
+        entry["sitemap"] = parser.is_index
+        yield entry
+
+async def iter_sitemap_urls(
+    sitemap_url: str,
+    limit: Optional[int] = None,
+    max_depth: Optional[int] = None,
+    _depth: int = 0,
+    _seen: Optional[Set[str]] = None
+) -> AsyncIterator[Dict[str, Optional[str]]]:
+    """
+    Yield {"loc", "lastmod"} for the pages of a sitemap as the file
+    downloads, following sitemap indexes up to max_depth levels
+    (SITEMAP_MAX_DEPTH by default) and decompressing .xml.gz files. Stops
+    after limit pages. Nested sitemaps that fail to load are skipped; the
+    top-level one raises.
+    """
+    max_depth = settings.SITEMAP_MAX_DEPTH if max_depth is None else max_depth
+    seen = set() if _seen is None else _seen
+    seen.add(sitemap_url)
+    yielded = 0
+    # Child sitemaps are followed after the index itself is read, so only one download is open at a time
+    children: List[str] = []
+    # Close the download as soon as the limit is reached rather than when the generator is collected
+    entries = _stream_sitemap(sitemap_url, settings.SITEMAP_MAX_BYTES)
+    try:
+        async for entry in entries:
+            if entry.pop("sitemap"):
+                if _depth < max_depth and entry["loc"] not in seen:
+                    seen.add(entry["loc"])
+                    children.append(entry["loc"])
+                continue
+            yield entry
+            yielded += 1
+            if limit is not None and yielded >= limit:
+                return
+    finally:
+        await entries.aclose()
+
+    for child_url in children:
+        remaining = None if limit is None else limit - yielded
+        child_entries = iter_sitemap_urls(child_url, remaining, max_depth, _depth + 1, seen)
+        try:
+            async for entry in child_entries:
+                yield entry
+                yielded += 1
+        except Exception as e:
+            print(f"Error reading sitemap {child_url}: {str(e)}")
+        finally:
+            await child_entries.aclose()
+        if limit is not None and yielded >= limit:
+            return
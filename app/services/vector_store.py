@@ -0,0 +1,124 @@
+from abc import ABC, abstractmethod
+from typing import Optional, Dict, Any, List
+import asyncio
+import threading
+from app.core.config import settings
+
+class VectorStore(ABC):
+    """
+    Storage and retrieval of a bot's documents and their embeddings. The
+    module-level functions in app.services.elasticsearch go through the store
+    selected by VECTOR_STORE. Async methods default to running the sync ones
+    in a worker thread.
+    """
+
+    @abstractmethod
+    def create_index(self, index_id: str) -> bool:
+        """Create the storage for a bot. Returns False on failure."""
+
+    @abstractmethod
+    def delete_index(self, index_id: str) -> bool:
+        """Delete a bot's storage. Returns False on failure."""
+
+    @abstractmethod
+    def index_exists(self, index_id: str) -> bool:
+        """Whether the storage for a bot exists."""
+
+    @abstractmethod
+    def add(self, index_id: str, document: Dict[str, Any]) -> str:
+        """
+        Store a document (content, metadata, created_at, embedding, and
+        optionally id, source and content_hash) and return its id. Storing a
+        document with an existing id replaces it.
+        """
+
+    def bulk_add(self, index_id: str, documents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Store several documents. Returns one result per document, in order:
+        {"id": ..., "status": "success"} or {"id": None, "status": "failed", "error": ...}
+        """
+        results = []
+        for document in documents:
+            try:
+                results.append({"id": self.add(index_id, document), "status": "success"})
+            except Exception as e:
+                results.append({"id": None, "status": "failed", "error": str(e)})
+        return results
+
+    @abstractmethod
+    def delete(self, index_id: str, ids: List[str]) -> int:
+        """Delete documents by id. Returns how many were deleted."""
+
+    @abstractmethod
+    def get_source_hashes(self, index_id: str, source: str) -> Dict[str, str]:
+        """Return {id: content_hash} for every document stored from a source."""
+
+    @abstractmethod
+    def search(
+        self,
+        index_id: str,
+        query: str,
+        query_embedding: List[float],
+        size: int = 10,
+        mode: Optional[str] = None,
+        k: Optional[int] = None,
+        num_candidates: Optional[int] = None,
+        lexical_weight: Optional[float] = None,
+        vector_weight: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """Return the best hits as dicts with id, content, metadata, created_at and score."""
+
+    async def create_index_async(self, index_id: str) -> bool:
+        return await asyncio.to_thread(self.create_index, index_id)
+
+    async def delete_index_async(self, index_id: str) -> bool:
+        return await asyncio.to_thread(self.delete_index, index_id)
+
+    async def add_async(self, index_id: str, document: Dict[str, Any]) -> str:
+        return await asyncio.to_thread(self.add, index_id, document)
+
+    async def bulk_add_async(self, index_id: str, documents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(self.bulk_add, index_id, documents)
+
+    async def delete_async(self, index_id: str, ids: List[str]) -> int:
+        return await asyncio.to_thread(self.delete, index_id, ids)
+
+    async def get_source_hashes_async(self, index_id: str, source: str) -> Dict[str, str]:
+        return await asyncio.to_thread(self.get_source_hashes, index_id, source)
+
+    async def search_async(self, index_id: str, query: str, query_embedding: List[float], **kwargs) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(self.search, index_id, query, query_embedding, **kwargs)
+
+_vector_store: Optional[VectorStore] = None
+_vector_store_lock = threading.Lock()
+
+def create_vector_store(backend: str) -> VectorStore:
+    """
+    Create the vector store selected in settings
+    """
+    if backend == "elasticsearch":
+        from app.services.elasticsearch import ElasticsearchVectorStore
+        return ElasticsearchVectorStore()
+    if backend == "local":
+        from app.services.local_vector_store import LocalVectorStore
+        return LocalVectorStore(settings.LOCAL_VECTOR_STORE_PATH)
+    raise ValueError(f"Unsupported vector store: {backend}")
+
+def get_vector_store() -> VectorStore:
+    """
+    Get the vector store selected in settings, creating it on first use
+    """
+    global _vector_store
+    if _vector_store is None:
+        with _vector_store_lock:
+            if _vector_store is None:
+                _vector_store = create_vector_store(settings.VECTOR_STORE)
+    return _vector_store
+
+def set_vector_store(store: Optional[VectorStore]):
+    """
+    Replace the active vector store, e.g. with a LocalVectorStore in tests
+    """
+    global _vector_store
+    with _vector_store_lock:
+        _vector_store = store
@@ -0,0 +1,296 @@
+from html.parser import HTMLParser
+from typing import Optional, Dict, List, Tuple, Iterator, Union
+import re
+
+# Elements whose content is never visible text. <head> itself is not skipped, since
+# pages often leave it unclosed; its children that hold text are
+SKIPPED_TAGS = {"script", "style", "noscript", "template", "svg", "title", "iframe", "object"}
+
+# Elements that start a new line in the rendered page
+BLOCK_TAGS = {
+    "address", "article", "aside", "blockquote", "br", "dd", "div", "dl", "dt", "figcaption",
+    "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6", "header", "hr", "li",
+    "main", "nav", "ol", "p", "pre", "section", "table", "td", "th", "tr", "ul"
+}
+
+# HTML void elements never get an end tag, so they must not change the skip depth
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+
+class HTMLTextExtractor(HTMLParser):
+    """
+    Collects the visible text of an HTML page, one line per block element,
+    roughly as a browser's innerText would. Also counts the signals used to
+    decide whether the page only renders with JavaScript.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self.script_count = 0
+        self.noscript_text: List[str] = []
+        self.title = ""
+        self._skip_depth = 0
+        self._stack: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "script":
+            self.script_count += 1
+        if tag in VOID_TAGS:
+            if tag in BLOCK_TAGS:
+                self.parts.append("\n")
+            return
+        if tag == "body" and self._skip_depth:
+            # Whatever was left open in the head ends where the body starts
+            self._stack = [open_tag for open_tag in self._stack if open_tag not in SKIPPED_TAGS]
+            self._skip_depth = 0
+        self._stack.append(tag)
+        if tag in SKIPPED_TAGS:
+            self._skip_depth += 1
+        elif tag in BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag not in self._stack:
+            return
+        # Close any elements left open inside this one, as browsers do
+        while self._stack:
+            open_tag = self._stack.pop()
+            if open_tag in SKIPPED_TAGS:
+                self._skip_depth -= 1
+            if open_tag == tag:
+                break
+        if tag in BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        current = self._stack[-1] if self._stack else None
+        if current == "title" and "svg" not in self._stack:
+            self.title += data
+        elif current == "noscript":
+            self.noscript_text.append(data)
+        if self._skip_depth == 0:
+            self.parts.append(data)
+
+    def get_text(self) -> str:
+        lines = (re.sub(r"\s+", " ", line).strip() for line in "".join(self.parts).split("\n"))
+        return "\n".join(line for line in lines if line)
+
+def parse_html(html: str) -> HTMLTextExtractor:
+    parser = HTMLTextExtractor()
+    parser.feed(html)
+    parser.close()
+    return parser
+
+def html_to_text(html: str) -> str:
+    """Visible text of an HTML page."""
+    return parse_html(html).get_text()
+
+def needs_javascript(parser: HTMLTextExtractor, text: str, min_text_chars: int) -> bool:
+    """
+    Heuristic for pages that only render their content in a browser: scripts
+    with almost no text in the served HTML (an empty single-page-app shell),
+    or a <noscript> asking to enable JavaScript on a page with little text.
+    """
+    if parser.script_count == 0:
+        return False
+    if len(text) < min_text_chars:
+        return True
+    # Many static sites carry such a notice too, so only trust it on short pages
+    return "javascript" in " ".join(parser.noscript_text).lower() and len(text) < min_text_chars * 5
+
+class Node:
+    """Element of a parsed HTML tree; children are Nodes and text strings."""
+    __slots__ = ("tag", "attrs", "children", "parent")
+
+    def __init__(self, tag: str, attrs: Dict[str, str], parent: Optional["Node"] = None):
+        self.tag = tag
+        self.attrs = attrs
+        self.children: List[Union["Node", str]] = []
+        self.parent = parent
+
+    @property
+    def classes(self) -> List[str]:
+        return self.attrs.get("class", "").split()
+
+    def iter(self) -> Iterator["Node"]:
+        """This node and its descendant elements, in document order."""
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(child for child in reversed(node.children) if isinstance(child, Node))
+
+    def remove(self):
+        if self.parent is not None:
+            self.parent.children = [child for child in self.parent.children if child is not self]
+            self.parent = None
+
+class HTMLTreeBuilder(HTMLParser):
+    """Builds a Node tree of the visible parts of a page, dropping scripts, styles and the like."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = Node("#document", {})
+        self._current = self.root
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "body":
+            # Whatever was left open in the head ends where the body starts
+            self._skip_depth = 0
+        if self._skip_depth:
+            if tag in SKIPPED_TAGS and tag not in VOID_TAGS:
+                self._skip_depth += 1
+            return
+        if tag in SKIPPED_TAGS:
+            self._skip_depth = 1
+            return
+        node = Node(tag, {name: value or "" for name, value in attrs}, self._current)
+        self._current.children.append(node)
+        if tag not in VOID_TAGS:
+            self._current = node
+
+    def handle_endtag(self, tag):
+        if self._skip_depth:
+            if tag in SKIPPED_TAGS:
+                self._skip_depth -= 1
+            return
+        # Close any elements left open inside this one, as browsers do
+        node = self._current
+        while node is not self.root and node.tag != tag:
+            node = node.parent
+        if node is not self.root:
+            self._current = node.parent
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self._current.children.append(data)
+
+def parse_tree(html: str) -> Node:
+    builder = HTMLTreeBuilder()
+    builder.feed(html)
+    builder.close()
+    return builder.root
+
+def _text_parts(node: Node, parts: List[str]):
+    for child in node.children:
+        if isinstance(child, str):
+            parts.append(child)
+            continue
+        if child.tag in BLOCK_TAGS:
+            parts.append("\n")
+        _text_parts(child, parts)
+        if child.tag in BLOCK_TAGS:
+            parts.append("\n")
+
+def node_text(node: Node) -> str:
+    """Visible text of an element, one line per block element."""
+    parts: List[str] = []
+    _text_parts(node, parts)
+    lines = (re.sub(r"\s+", " ", line).strip() for line in "".join(parts).split("\n"))
+    return "\n".join(line for line in lines if line)
+
+_SELECTOR_TOKEN = re.compile(r"""#[\w-]+|\.[\w-]+|\[\s*[\w-]+\s*(?:[*^$~]?=\s*(?:"[^"]*"|'[^']*'|[^\]\s]+)\s*)?\]|[a-zA-Z][\w-]*|\*""")
+_ATTRIBUTE = re.compile(r"""\[\s*([\w-]+)\s*(?:([*^$~]?=)\s*("[^"]*"|'[^']*'|[^\]\s]+)\s*)?\]""")
+
+# A compound selector token, or the separator between selectors or steps
+_SELECTOR_PART = re.compile(r"\s*([,>])\s*|\s+|" + _SELECTOR_TOKEN.pattern)
+
+def parse_selectors(selectors: Optional[str]) -> List[List[Tuple[str, List[str]]]]:
+    """
+    Parse a comma-separated CSS selector list. Supports type, #id, .class and
+    [attr], [attr=value] (also *=, ^=, $=, ~=) selectors, combined with
+    descendant (space) and child (>) combinators. Each selector becomes a list
+    of (combinator, compound) steps, the first combinator being "".
+    """
+    text = (selectors or "").strip()
+    parsed = []
+    steps: List[Tuple[str, List[str]]] = []
+    compound: List[str] = []
+    combinator = ""
+    position = 0
+    # Scan the whole list at once, so quoted attribute values may hold spaces, commas and ">"
+    while position < len(text):
+        match = _SELECTOR_PART.match(text, position)
+        if not match:
+            raise ValueError(f"Unsupported CSS selector: {text}")
+        position = match.end()
+        part = match.group()
+        separator = part.strip()
+        if separator and separator not in (",", ">"):
+            compound.append(part)
+            continue
+        if compound:
+            steps.append((combinator, compound))
+            compound, combinator = [], " "
+        if separator == ",":
+            if steps:
+                parsed.append(steps)
+            steps, combinator = [], ""
+        elif separator == ">":
+            combinator = ">"
+    if compound:
+        steps.append((combinator, compound))
+    if steps:
+        parsed.append(steps)
+    return parsed
+
+def _matches_compound(node: Node, tokens: List[str]) -> bool:
+    for token in tokens:
+        if token == "*":
+            continue
+        if token[0] == "#":
+            if node.attrs.get("id") != token[1:]:
+                return False
+        elif token[0] == ".":
+            if token[1:] not in node.classes:
+                return False
+        elif token[0] == "[":
+            name, operator, value = _ATTRIBUTE.match(token).groups()
+            actual = node.attrs.get(name.lower())
+            if actual is None:
+                return False
+            value = (value or "").strip("\"'")
+            if operator == "=" and actual != value:
+                return False
+            if operator == "*=" and value not in actual:
+                return False
+            if operator == "^=" and not actual.startswith(value):
+                return False
+            if operator == "$=" and not actual.endswith(value):
+                return False
+            if operator == "~=" and value not in actual.split():
+                return False
+        elif node.tag != token.lower():
+            return False
+    return True
+
+def _matches_steps(node: Optional[Node], steps: List[Tuple[str, List[str]]]) -> bool:
+    combinator, tokens = steps[-1]
+    if node is None or node.tag == "#document" or not _matches_compound(node, tokens):
+        return False
+    if len(steps) == 1:
+        return True
+    if combinator == ">":
+        return _matches_steps(node.parent, steps[:-1])
+    ancestor = node.parent
+    while ancestor is not None:
+        if _matches_steps(ancestor, steps[:-1]):
+            return True
+        ancestor = ancestor.parent
+    return False
+
+def matches(node: Node, selectors: List[List[Tuple[str, List[str]]]]) -> bool:
+    return any(_matches_steps(node, steps) for steps in selectors)
+
+def select(root: Node, selectors: List[List[Tuple[str, List[str]]]]) -> List[Node]:
+    """Elements matching any of the parsed selectors, outermost only, in document order."""
+    found = []
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if node is not root and matches(node, selectors):
+            found.append(node)
+            continue
+        stack.extend(child for child in reversed(node.children) if isinstance(child, Node))
+    return found
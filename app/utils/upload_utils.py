@@ -0,0 +1,51 @@
+from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
+from typing import BinaryIO
+import io
+import os
+
+class UploadTooLargeError(ValueError):
+    """Raised when an upload exceeds the configured maximum size."""
+
+    def __init__(self, max_bytes: int):
+        super().__init__(f"File is larger than the {max_bytes} byte limit")
+        self.max_bytes = max_bytes
+
+def _copy_limited(source: BinaryIO, destination: BinaryIO, max_bytes: int, chunk_size: int) -> int:
+    """Copy source to destination chunk by chunk, stopping as soon as max_bytes is exceeded."""
+    written = 0
+    while True:
+        chunk = source.read(chunk_size)
+        if not chunk:
+            return written
+        written += len(chunk)
+        if written > max_bytes:
+            raise UploadTooLargeError(max_bytes)
+        destination.write(chunk)
+
+async def read_upload_to_memory(file: UploadFile, max_bytes: int, chunk_size: int) -> io.BytesIO:
+    """Read a small upload into a single in-memory buffer."""
+    buffer = io.BytesIO()
+    await file.seek(0)
+    await run_in_threadpool(_copy_limited, file.file, buffer, max_bytes, chunk_size)
+    buffer.seek(0)
+    return buffer
+
+async def save_upload(file: UploadFile, path: str, max_bytes: int, chunk_size: int) -> int:
+    """
+    Stream an upload to path in fixed-size chunks without holding it in memory.
+    The partial file is removed if the upload is too large or the copy fails.
+    """
+    await file.seek(0)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def copy() -> int:
+        with open(path, "wb") as destination:
+            return _copy_limited(file.file, destination, max_bytes, chunk_size)
+
+    try:
+        return await run_in_threadpool(copy)
+    except BaseException:
+        if os.path.exists(path):
+            os.remove(path)
+        raise
@@ -0,0 +1,51 @@
+"""
+Fail when importing app.main exceeds the startup budget or pulls in the
+embedding model's heavy dependencies.
+
+Usage: python -m scripts.check_import_time [--budget 2.0]
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+# Modules that must only load lazily, on first embedding or in the warm-up hook
+HEAVY_MODULES = ["torch", "sentence_transformers", "transformers", "onnxruntime"]
+
+MEASURE = """
+import json, sys, time
+start = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - start
+print(json.dumps({"elapsed": elapsed, "loaded": [m for m in %r if m in sys.modules]}))
+"""
+
+def measure_import() -> dict:
+    # Measure in a fresh interpreter so nothing is already cached in sys.modules
+    result = subprocess.run(
+        [sys.executable, "-c", MEASURE % HEAVY_MODULES],
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--budget", type=float, default=2.0, help="Maximum import time in seconds")
+    args = parser.parse_args()
+
+    measurement = measure_import()
+    print(f"Importing app.main took {measurement['elapsed']:.2f}s (budget {args.budget:.2f}s)")
+
+    failed = False
+    if measurement["elapsed"] > args.budget:
+        print("Import time is over budget")
+        failed = True
+    if measurement["loaded"]:
+        print(f"Heavy modules loaded at import time: {', '.join(measurement['loaded'])}")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Export the sentence-transformers embedding model to ONNX, quantize it to int8
+and check that its vectors stay close to the PyTorch ones.
+
+Usage: python -m scripts.export_onnx_model <output_dir> [--min-cosine 0.99]
+Then set EMBEDDING_BACKEND=onnx and EMBEDDING_ONNX_MODEL_DIR=<output_dir>.
+"""
+import argparse
+import inspect
+import os
+import sys
+import torch
+from onnxruntime.quantization import QuantType, quantize_dynamic
+from app.core.config import settings
+from app.services.embedding_backends import (
+    OnnxEmbeddingBackend,
+    SentenceTransformerBackend,
+    check_backend_parity
+)
+
+PARITY_TEXTS = [
+    "How do I reset my password?",
+    "Error code E1234 appears when the device starts up.",
+    "Our refund policy allows returns within 30 days of purchase, provided the item is unused.",
+    "The quarterly report shows revenue growth across all regions, driven mostly by new subscriptions.",
+    "Installez le logiciel puis redémarrez l'ordinateur.",
+    "",
+]
+
+def export(output_dir: str):
+    os.makedirs(output_dir, exist_ok=True)
+    reference = SentenceTransformerBackend(settings.EMBEDDING_MODEL_NAME)
+    transformer = reference.model[0].auto_model.eval()
+
+    sample = reference.tokenizer(["export sample"], return_tensors="pt")
+    # Graph inputs follow forward()'s signature (input_ids, attention_mask, token_type_ids for BERT),
+    # not the tokenizer's key order, so name them in that order and pass them by keyword
+    parameters = inspect.signature(transformer.forward).parameters
+    input_names = [name for name in parameters if name in sample]
+    fp32_path = os.path.join(output_dir, "model.onnx")
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer,
+            ({name: sample[name] for name in input_names},),
+            fp32_path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14
+        )
+
+    quantize_dynamic(
+        fp32_path,
+        os.path.join(output_dir, "model_quantized.onnx"),
+        weight_type=QuantType.QInt8
+    )
+    reference.tokenizer.save_pretrained(output_dir)
+    return reference
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("output_dir")
+    parser.add_argument("--min-cosine", type=float, default=0.99)
+    args = parser.parse_args()
+
+    reference = export(args.output_dir)
+    candidate = OnnxEmbeddingBackend(
+        settings.EMBEDDING_MODEL_NAME,
+        args.output_dir,
+        max_seq_length=reference.max_seq_length
+    )
+    try:
+        worst = check_backend_parity(reference, candidate, PARITY_TEXTS, min_cosine=args.min_cosine)
+    except ValueError as e:
+        print(f"Parity check failed: {str(e)}")
+        sys.exit(1)
+    print(f"Exported {candidate.name} to {args.output_dir} (lowest cosine similarity {worst:.4f})")
+
+if __name__ == "__main__":
+    main()